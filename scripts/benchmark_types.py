@@ -0,0 +1,94 @@
+"""
+Rows per second of date/time result processors, compared to plain strptime
+
+    python scripts/benchmark_types.py [rows]
+"""
+
+import datetime
+import sys
+import time
+
+from sqlalchemy_iris import dialect
+from sqlalchemy_iris.types import HOROLOG_ORDINAL
+from sqlalchemy_iris.types import IRISDate
+from sqlalchemy_iris.types import IRISDateTime
+from sqlalchemy_iris.types import IRISTime
+from sqlalchemy_iris.types import IRISTimeStamp
+
+
+def strptime_date(value):
+    if isinstance(value, str) and "-" in value[1:]:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    return datetime.date.fromordinal(int(value) + HOROLOG_ORDINAL)
+
+
+def strptime_datetime(value):
+    if "." not in value:
+        value += ".0"
+    return datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+
+
+def strptime_time(value):
+    if "." not in value:
+        value += ".0"
+    return datetime.datetime.strptime(value, "%H:%M:%S.%f").time()
+
+
+def sample(rows):
+    start = datetime.datetime(2024, 1, 1)
+    for i in range(rows):
+        value = start + datetime.timedelta(seconds=i * 37, microseconds=i % 1000)
+        yield value
+
+
+def measure(process, values):
+    started = time.perf_counter()
+    for value in values:
+        process(value)
+    return len(values) / (time.perf_counter() - started)
+
+
+def main(rows):
+    values = list(sample(rows))
+    cases = [
+        (
+            "DATE",
+            IRISDate,
+            strptime_date,
+            [v.strftime("%Y-%m-%d") for v in values],
+        ),
+        (
+            "DATE $HOROLOG",
+            IRISDate,
+            strptime_date,
+            [str(v.toordinal() - HOROLOG_ORDINAL) for v in values],
+        ),
+        (
+            "DATETIME",
+            IRISDateTime,
+            strptime_datetime,
+            [v.strftime("%Y-%m-%d %H:%M:%S.%f") for v in values],
+        ),
+        (
+            "TIMESTAMP",
+            IRISTimeStamp,
+            strptime_datetime,
+            [v.strftime("%Y-%m-%d %H:%M:%S") for v in values],
+        ),
+        (
+            "TIME",
+            IRISTime,
+            strptime_time,
+            [v.strftime("%H:%M:%S.%f") for v in values],
+        ),
+    ]
+    print("%-15s %15s %15s %8s" % ("type", "strptime", "dialect", "speedup"))
+    for name, type_, baseline, data in cases:
+        process = type_().result_processor(dialect(), None)
+        before = measure(baseline, data)
+        after = measure(process, data)
+        print("%-15s %15d %15d %7.1fx" % (name, before, after, after / before))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -26,6 +26,7 @@ from .base import VARBINARY
 from .base import VARCHAR
 from .base import IRISListBuild
 from .base import IRISVector
+from .base import iris_exact
 
 base.dialect = dialect = iris.dialect
 
@@ -51,5 +52,6 @@ __all__ = [
     "VARCHAR",
     "IRISListBuild",
     "IRISVector",
+    "iris_exact",
     "dialect",
 ]
@@ -1,19 +1,35 @@
+import decimal
 import re
+import sys
+import time
+import weakref
+from itertools import islice
 import intersystems_iris.dbapi._DBAPI as dbapi
 import intersystems_iris._IRISNative as IRISNative
 from . import information_schema as ischema
+from .reflection_cache import cached_reflection
+from .warmup import warmup
+from .bulk import iris_load
 from sqlalchemy import exc
 from sqlalchemy.orm import aliased
 from sqlalchemy.engine import default
 from sqlalchemy.engine import reflection
 from sqlalchemy.sql import compiler
 from sqlalchemy.sql import util as sql_util
+from sqlalchemy.sql.base import ExecutableOption
+from sqlalchemy.sql.traversals import HasCacheKey
+from sqlalchemy.sql.visitors import InternalTraversal
 from sqlalchemy.sql import between
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.sql.functions import ReturnTypeFromArgs
+from sqlalchemy.sql.elements import BinaryExpression
+from sqlalchemy.sql.elements import BindParameter
 from sqlalchemy.sql.elements import Null
+from sqlalchemy.sql.elements import UnaryExpression
 from sqlalchemy.sql.elements import quoted_name
 from sqlalchemy.sql import expression
+from sqlalchemy.sql import operators
 from sqlalchemy.sql import schema
 from sqlalchemy import sql, text
 from sqlalchemy import util
@@ -24,8 +40,10 @@ from sqlalchemy import __version__ as sqlalchemy_version
 if sqlalchemy_version.startswith("2."):
     from sqlalchemy.engine import ObjectKind
     from sqlalchemy.engine import ObjectScope
+    from sqlalchemy.engine.interfaces import ExecuteStyle
     from sqlalchemy.engine.reflection import ReflectionDefaults
 else:
+    from enum import Enum
     from enum import Flag
 
     class ObjectKind(Flag):
@@ -38,6 +56,11 @@ else:
         TEMPORARY = 2
         ANY = DEFAULT | TEMPORARY
 
+    class ExecuteStyle(Enum):
+        EXECUTE = 0
+        EXECUTEMANY = 1
+        INSERTMANYVALUES = 2
+
     class ReflectionDefaults:
         @classmethod
         def columns(cls):
@@ -496,49 +519,67 @@ class IRISCompiler(sql.compiler.SQLCompiler):
     def visit_irisexact_func(self, fn, **kw):
         return "%EXACT" + self.function_argspec(fn)
 
+    def _exact_ordered_strings(self, select):
+        """
+        %EXACT() for ordered strings, from the iris_exact() option of the select
+        or of the compiled statement, which is part of the cache key, or the dialect
+        """
+        options = select._with_options + getattr(self.statement, "_with_options", ())
+        for option in options:
+            if isinstance(option, IRISExactOption):
+                return option.exact
+        return self.dialect.exact_ordered_strings
+
     def _use_exact_for_ordered_string(self, select):
         """
         `SELECT string_value FROM some_table ORDER BY string_value`
         Will return `string_value` in uppercase
-        So, this method fixes query to use %EXACT() function
+        So, this method returns columns of the query to use %EXACT() function
         `SELECT %EXACT(string_value) AS string_value FROM some_table ORDER BY string_value`
+        or None, when no column has to be changed
         """
-
-        def _add_exact(column):
-            if isinstance(column.type, sqltypes.String):
-                return IRISExact(column).label(
-                    column._label if column._label else column.name
-                )
-            return column
-
-        _order_by_clauses = [
-            sql_util.unwrap_label_reference(elem)
-            for elem in select._order_by_clause.clauses
-            if isinstance(elem, schema.Column)
+        ordered = set()
+        for elem in select._order_by_clause.clauses:
+            if isinstance(elem, schema.Column) and isinstance(
+                elem.type, sqltypes.String
+            ):
+                ordered.add(elem)
+        if not ordered:
+            return None
+        if not any(c in ordered for c in select._raw_columns):
+            return None
+        if not self._exact_ordered_strings(select):
+            return None
+
+        return [
+            (
+                IRISExact(c).label(c._label if c._label else c.name)
+                if c in ordered
+                else c
+            )
+            for c in select._raw_columns
         ]
-        if _order_by_clauses:
-            select._raw_columns = [
-                (
-                    _add_exact(c)
-                    if isinstance(c, schema.Column) and c in _order_by_clauses
-                    else c
-                )
-                for c in select._raw_columns
-            ]
-
-        return select
 
     def translate_select_structure(self, select_stmt, **kwargs):
+        """
+        The statement is never changed, the rewritten one is a copy,
+        which is compiled once per cache key and then kept in the compiled cache
+        """
         select = select_stmt
         if getattr(select, "_iris_visit", None) is True:
             return select
 
-        select._iris_visit = True
-        select = select._generate()
+        raw_columns = self._use_exact_for_ordered_string(select)
+        row_number = select._has_row_limiting_clause and not self._use_top(select)
+        if raw_columns is None and not row_number:
+            return select
 
-        select = self._use_exact_for_ordered_string(select)
+        select = select._generate()
+        select._iris_visit = True
+        if raw_columns is not None:
+            select._raw_columns = raw_columns
 
-        if not (select._has_row_limiting_clause and not self._use_top(select)):
+        if not row_number:
             return select
 
         """Look for ``LIMIT`` and OFFSET in a select statement, and if
@@ -575,10 +616,46 @@ class IRISCompiler(sql.compiler.SQLCompiler):
                 limitselect = limitselect.where(iris_rn > offset_clause)
         else:
             limitselect = limitselect.where(iris_rn <= (limit_clause))
+        limitselect._iris_visit = True
         return limitselect
 
+    def _vector_order_by(self, order_by_clause):
+        """
+        `ORDER BY 1 - vector_cosine(...)` is the same as `ORDER BY vector_cosine(...) DESC`,
+        but only the latter allows IRIS to use HNSW index with `TOP k`
+        """
+
+        def _reorder(clause):
+            element = clause
+            descending = False
+            if isinstance(element, UnaryExpression) and element.modifier in (
+                operators.asc_op,
+                operators.desc_op,
+            ):
+                descending = element.modifier is operators.desc_op
+                element = element.element
+            if (
+                isinstance(element, BinaryExpression)
+                and element.operator is operators.sub
+                and isinstance(element.left, BindParameter)
+                and isinstance(element.left.value, int)
+                and element.left.value == 1
+                and isinstance(element.right, FunctionElement)
+                and element.right.name.lower() == "vector_cosine"
+            ):
+                return element.right.asc() if descending else element.right.desc()
+            return clause
+
+        clauses = [_reorder(clause) for clause in order_by_clause.clauses]
+        if all(
+            clause is original
+            for clause, original in zip(clauses, order_by_clause.clauses)
+        ):
+            return order_by_clause
+        return expression.ClauseList(*clauses)
+
     def order_by_clause(self, select, **kw):
-        order_by = self.process(select._order_by_clause, **kw)
+        order_by = self.process(self._vector_order_by(select._order_by_clause), **kw)
 
         if order_by and (not self.is_subquery() or select._limit):
             return " ORDER BY " + order_by
@@ -719,6 +796,19 @@ class IRISDDLCompiler(sql.compiler.DDLCompiler):
         index = create.element
         preparer = self.preparer
 
+        # index class, such as HNSW for vectors
+        using = index.dialect_options["iris"]["using"]
+        if using:
+            if not _index_class.match(using):
+                raise exc.CompileError("Invalid index class %r" % (using,))
+            text += " AS %s" % using
+            parameters = index.dialect_options["iris"]["with"]
+            if parameters:
+                text += "(%s)" % ", ".join(
+                    "%s = %s" % (name, self._index_parameter(name, value))
+                    for name, value in parameters.items()
+                )
+
         # handle other included columns
         includeclause = index.dialect_options["iris"]["include"]
         if includeclause:
@@ -733,6 +823,19 @@ class IRISDDLCompiler(sql.compiler.DDLCompiler):
 
         return text
 
+    def _index_parameter(self, name, value):
+        if not isinstance(name, str) or not _index_parameter_name.match(name):
+            raise exc.CompileError("Invalid index parameter name %r" % (name,))
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, str):
+            return self.sql_compiler.render_literal_value(value, sqltypes.String())
+        if isinstance(value, (int, float, decimal.Decimal)):
+            return str(value)
+        raise exc.CompileError(
+            "Invalid value %r of index parameter %s" % (value, name)
+        )
+
     def visit_drop_index(self, drop, **kw):
         return "DROP INDEX %s ON %s" % (
             self._prepared_index_name(drop.element, include_schema=False),
@@ -804,6 +907,9 @@ class IRISIdentifierPreparer(sql.compiler.IdentifierPreparer):
 
 
 class IRISExecutionContext(default.DefaultExecutionContext):
+    _identity_rows = None
+    _executemany_rowcount = None
+
     def get_lastrowid(self):
         try:
             return self.cursor.lastrowid
@@ -813,10 +919,81 @@ class IRISExecutionContext(default.DefaultExecutionContext):
             lastrowid = cursor.fetchone()[0]
             return lastrowid
 
-    def create_cursor(self):
+    def create_default_cursor(self):
         cursor = self._dbapi_connection.cursor()
         return cursor
 
+    @property
+    def rowcount(self):
+        # rows of all the chunks of do_executemany(), the cursor has the last one
+        if self._executemany_rowcount is not None:
+            return self._executemany_rowcount
+        return super().rowcount
+
+    def create_server_side_cursor(self):
+        cursor = self._dbapi_connection.cursor()
+        cursor.arraysize = (
+            self.execution_options.get("yield_per")
+            or self.execution_options.get("max_row_buffer")
+            or self.dialect.server_side_fetch_size
+        )
+        return cursor
+
+    @util.memoized_property
+    def _collects_identity_range(self):
+        table = self.compiled.statement.table
+        autoinc_col = table._autoincrement_column
+        if autoinc_col is None:
+            return False
+        key = self.compiled._within_exec_param_key_getter(autoinc_col)
+        return all(param.get(key) is None for param in self.compiled_parameters)
+
+    def _collect_identity_range(self):
+        """
+        IDENTITY values generated by one multi-row INSERT are consecutive,
+        so LAST_IDENTITY() and the number of inserted rows are enough
+        to restore the primary keys of the whole batch
+        """
+        if not self._collects_identity_range:
+            return
+        rowcount = self.cursor.rowcount
+        if rowcount is None or rowcount < 1:
+            return
+        lastrowid = self.get_lastrowid()
+        if lastrowid is None:
+            return
+        lastrowid = int(lastrowid)
+        if self._identity_rows is None:
+            self._identity_rows = []
+        self._identity_rows.extend(range(lastrowid - rowcount + 1, lastrowid + 1))
+
+    def pre_exec(self):
+        super().pre_exec()
+        # keywords of iris_bulk_mode(), per table
+        prefixes = self.execution_options.get("iris_prefixes")
+        if prefixes and (self.isinsert or self.isupdate or self.isdelete):
+            prefix = prefixes.get(self.compiled.compile_state.dml_table.fullname)
+            if prefix:
+                self.statement = _dml_statement.sub(
+                    lambda match: "%s %s " % (match.group(1), prefix),
+                    self.statement,
+                    count=1,
+                )
+
+    def post_exec(self):
+        super().post_exec()
+        if self.dialect.ping_window_ms:
+            self.dialect._mark_verified(self.root_connection.connection.dbapi_connection)
+        identity_rows = self._identity_rows
+        if identity_rows is not None and len(identity_rows) == len(
+            self.compiled_parameters
+        ):
+            getter = self.compiled._inserted_primary_key_from_lastrowid_getter
+            self.inserted_primary_key_rows = [
+                getter(lastrowid, param)
+                for lastrowid, param in zip(identity_rows, self.compiled_parameters)
+            ]
+
 
 colspecs = {
     sqltypes.Boolean: IRISBoolean,
@@ -837,6 +1014,45 @@ class IRISExact(ReturnTypeFromArgs):
     inherit_cache = True
 
 
+class IRISExactOption(HasCacheKey, ExecutableOption):
+    """
+    Option of a statement, with `exact=False` strings selected and ordered
+    are returned without %EXACT(), it is part of the cache key of the statement
+    """
+
+    _traverse_internals = [("exact", InternalTraversal.dp_boolean)]
+
+    # read by the ORM on each option of a statement, this one is for the compiler
+    _is_compile_state = False
+    _is_criteria_option = False
+    _is_strategy_option = False
+    _is_legacy_option = False
+    _is_user_defined = False
+    propagate_to_loaders = False
+
+    def __init__(self, exact=True):
+        self.exact = bool(exact)
+
+
+def iris_exact(exact=True):
+    """
+    `select(table.c.name).order_by(table.c.name).options(iris_exact(False))`
+    """
+    return IRISExactOption(exact)
+
+
+# features probed per server, when probe_features_ttl is set
+_server_features = {}
+
+# class and parameters of an index, `AS HNSW(M = 16)`
+_index_class = re.compile(r"^%?[A-Za-z][A-Za-z0-9]*(\.%?[A-Za-z][A-Za-z0-9]*)*\Z")
+_index_parameter_name = re.compile(r"^%?[A-Za-z][A-Za-z0-9]*\Z")
+
+_ddl_statement = re.compile(r"\s*(CREATE|ALTER|DROP)\s", re.I)
+
+_dml_statement = re.compile(r"\s*(INSERT|UPDATE|DELETE)\s", re.I)
+
+
 class IRISDialect(default.DefaultDialect):
     name = "iris"
 
@@ -860,6 +1076,19 @@ class IRISDialect(default.DefaultDialect):
 
     supports_multivalues_insert = True
 
+    # executemany() of INSERT is sent as a few multi-row INSERT statements
+    use_insertmanyvalues = True
+    use_insertmanyvalues_wo_returning = True
+    insertmanyvalues_page_size = 1000
+    insertmanyvalues_max_parameters = 32700
+
+    # restore primary keys of executemany() INSERT through LAST_IDENTITY()
+    identity_ranges = False
+
+    # send executemany() parameters to the driver in chunks
+    executemany_chunk_size = None
+    executemany_max_memory = None
+
     supports_sequences = False
 
     returns_native_bytes = True
@@ -873,6 +1102,44 @@ class IRISDialect(default.DefaultDialect):
 
     supports_vectors = None
 
+    # features of the server are probed once per engine,
+    # or once per server within probe_features_ttl seconds
+    probe_features = True
+    probe_features_ttl = None
+    _server_identity = None
+
+    # open pool_size connections, or that number of connections, with the engine
+    pool_warmup = False
+    warmup_stats = None
+
+    # pool_pre_ping skips connections which executed a statement within that time
+    ping_window_ms = None
+
+    # %EXACT() for strings selected and ordered, not needed with EXACT collation,
+    # it may also be changed per statement with the iris_exact() option
+    exact_ordered_strings = True
+
+    # binds of dates and times, "string" sends them as text, "native" passes
+    # datetime objects to the driver, "logical" sends dates as $HOROLOG days
+    # and times as seconds, with True the mode of the driver is used
+    temporal_binds = "string"
+    binary_temporal_binds = "logical"
+
+    # stream_results=True and yield_per() fetch rows from the server in batches
+    supports_server_side_cursors = True
+    server_side_fetch_size = 1000
+
+    # keep reflected schemas until their classes are changed, see reflection_cache
+    reflection_cache = False
+    reflection_cache_path = None
+
+    # longer lists of reflected tables are not sent as IN (...) parameters
+    reflection_filter_max_names = 100
+
+    # answer has_table(), get_table_names() and get_view_names() from names
+    # loaded once per schema, until DDL is executed through this engine
+    catalog_snapshot = False
+
     colspecs = colspecs
 
     ischema_names = ischema_names
@@ -884,11 +1151,68 @@ class IRISDialect(default.DefaultDialect):
     execution_ctx_cls = IRISExecutionContext
 
     construct_arguments = [
-        (schema.Index, {"include": None}),
+        (schema.Index, {"include": None, "using": None, "with": None}),
     ]
 
-    def __init__(self, **kwargs):
+    def __init__(
+        self,
+        insertmanyvalues_max_parameters=None,
+        identity_ranges=None,
+        executemany_chunk_size=None,
+        executemany_max_memory=None,
+        server_side_fetch_size=None,
+        reflection_cache=None,
+        reflection_cache_path=None,
+        reflection_filter_max_names=None,
+        catalog_snapshot=None,
+        probe_features=None,
+        probe_features_ttl=None,
+        pool_warmup=None,
+        ping_window_ms=None,
+        exact_ordered_strings=None,
+        temporal_binds=None,
+        **kwargs,
+    ):
         default.DefaultDialect.__init__(self, **kwargs)
+        if insertmanyvalues_max_parameters is not None:
+            self.insertmanyvalues_max_parameters = insertmanyvalues_max_parameters
+        if identity_ranges is not None:
+            self.identity_ranges = identity_ranges
+        if executemany_chunk_size is not None:
+            self.executemany_chunk_size = executemany_chunk_size
+        if executemany_max_memory is not None:
+            self.executemany_max_memory = executemany_max_memory
+        if server_side_fetch_size is not None:
+            self.server_side_fetch_size = server_side_fetch_size
+        if reflection_cache is not None:
+            self.reflection_cache = reflection_cache
+        if reflection_cache_path is not None:
+            self.reflection_cache_path = reflection_cache_path
+        if reflection_filter_max_names is not None:
+            self.reflection_filter_max_names = reflection_filter_max_names
+        if catalog_snapshot is not None:
+            self.catalog_snapshot = catalog_snapshot
+        self._catalog = {}
+        if probe_features is not None:
+            self.probe_features = probe_features
+        if probe_features_ttl is not None:
+            self.probe_features_ttl = probe_features_ttl
+        self._features = None
+        if pool_warmup is not None:
+            self.pool_warmup = pool_warmup
+        if ping_window_ms is not None:
+            self.ping_window_ms = ping_window_ms
+        self._verified = weakref.WeakKeyDictionary()
+        if exact_ordered_strings is not None:
+            self.exact_ordered_strings = exact_ordered_strings
+        if temporal_binds is True:
+            temporal_binds = self.binary_temporal_binds
+        if temporal_binds not in (None, False, "string", "native", "logical"):
+            raise exc.ArgumentError(
+                "temporal_binds should be 'string', 'native', 'logical' or True"
+            )
+        if temporal_binds:
+            self.temporal_binds = temporal_binds
 
     def _get_server_version_info(self, connection):
         server_version = connection.connection._connection_info._server_version
@@ -910,6 +1234,14 @@ class IRISDialect(default.DefaultDialect):
     def _get_default_schema_name(self, connection):
         return IRISDialect.default_schema_name
 
+    @classmethod
+    def engine_created(cls, engine):
+        pool_warmup = engine.dialect.pool_warmup
+        # connections of asyncio dialects can only be opened on the event loop,
+        # see warmup_async()
+        if pool_warmup and not engine.dialect.is_async:
+            warmup(engine, None if pool_warmup is True else pool_warmup)
+
     def on_connect(self):
         super_ = super().on_connect()
 
@@ -917,33 +1249,74 @@ class IRISDialect(default.DefaultDialect):
             if super_ is not None:
                 super_(conn)
 
-            try:
-                with conn.cursor() as cursor:
-                    # Distance or similarity
-                    cursor.execute(
-                        "select vector_cosine(to_vector('1'), to_vector('1'))"
-                    )
-                self.supports_vectors = True
-            except:  # noqa
-                self.supports_vectors = False
-            self._dictionary_access = False
+            self._apply_features(self._connection_features(conn))
+
+        return on_connect
+
+    def connect(self, *cargs, **cparams):
+        self._connect_options(cparams)
+        return super().connect(*cargs, **cparams)
+
+    def _connect_options(self, cparams):
+        probe_features = cparams.pop("probe_features", None)
+        if probe_features is not None:
+            self.probe_features = probe_features
+        self._server_identity = (
+            self.driver,
+            cparams.get("hostname", cparams.get("host")),
+            cparams.get("port"),
+            cparams.get("namespace"),
+            cparams.get("username"),
+        )
+
+    def _connection_features(self, conn):
+        """
+        Features of the server, probed on the first connection of the engine,
+        or once per server within `probe_features_ttl` seconds.
+        `probe_features` as False or as dict of features skips the probes
+        """
+        if self.probe_features is not True:
+            return dict(self.probe_features or {})
+        if self.probe_features_ttl is None:
+            if self._features is None:
+                self._features = self._probe_features(conn)
+            return self._features
+        now = time.monotonic()
+        probed = _server_features.get(self._server_identity)
+        if probed is None or now - probed[0] > self.probe_features_ttl:
+            probed = (now, self._probe_features(conn))
+            _server_features[self._server_identity] = probed
+        return probed[1]
+
+    def _probe_features(self, conn):
+        features = {}
+        try:
             with conn.cursor() as cursor:
-                cursor.execute("%CHECKPRIV SELECT ON %Dictionary.PropertyDefinition")
-                self._dictionary_access = cursor.sqlcode == 0
-
-            # if not self.supports_vectors:
-            #     util.warn("No native support for VECTOR or not activated by license")
-            if not self._dictionary_access:
-                util.warn(
-                    """
+                # Distance or similarity
+                cursor.execute("select vector_cosine(to_vector('1'), to_vector('1'))")
+            features["supports_vectors"] = True
+        except:  # noqa
+            features["supports_vectors"] = False
+        with conn.cursor() as cursor:
+            cursor.execute("%CHECKPRIV SELECT ON %Dictionary.PropertyDefinition")
+            features["dictionary_access"] = cursor.sqlcode == 0
+
+        # if not self.supports_vectors:
+        #     util.warn("No native support for VECTOR or not activated by license")
+        if not features["dictionary_access"]:
+            util.warn(
+                """
 There are no access to %Dictionary, may be required for some advanced features,
  such as Calculated fields, and include columns in indexes
                 """.replace(
-                        "\n", ""
-                    )
+                    "\n", ""
                 )
+            )
+        return features
 
-        return on_connect
+    def _apply_features(self, features):
+        self.supports_vectors = features.get("supports_vectors", False)
+        self._dictionary_access = features.get("dictionary_access", False)
 
     def _get_option(self, connection, option):
         with connection.cursor() as cursor:
@@ -1001,20 +1374,48 @@ There are no access to %Dictionary, may be required for some advanced features,
             return "Connection is closed" in str(e)
         return False
 
+    def _mark_verified(self, dbapi_connection):
+        try:
+            self._verified[dbapi_connection] = time.monotonic()
+        except TypeError:
+            # connection does not support weak references
+            pass
+
     def do_ping(self, dbapi_connection):
+        is_closed = getattr(dbapi_connection, "isClosed", None)
+        if is_closed is not None and is_closed():
+            return False
+        if self.ping_window_ms:
+            try:
+                verified = self._verified.get(dbapi_connection)
+            except TypeError:
+                verified = None
+            if (
+                verified is not None
+                and (time.monotonic() - verified) * 1000 < self.ping_window_ms
+            ):
+                return True
+
         cursor = None
         try:
-            cursor = dbapi_connection.cursor()
-            try:
-                cursor.execute(self._dialect_specific_select_one)
-            finally:
-                cursor.close()
+            ping = getattr(dbapi_connection, "ping", None)
+            if ping is not None:
+                if ping() is False:
+                    return False
+            else:
+                cursor = dbapi_connection.cursor()
+                try:
+                    cursor.execute(self._dialect_specific_select_one)
+                finally:
+                    cursor.close()
         except self.dbapi.Error as err:
             if self.is_disconnect(err, dbapi_connection, cursor):
                 return False
             else:
                 raise
         else:
+            if self.ping_window_ms:
+                self._mark_verified(dbapi_connection)
             return True
 
     def create_connect_args(self, url):
@@ -1078,12 +1479,68 @@ There are no access to %Dictionary, may be required for some advanced features,
             query = query[:-1]
         self._debug(query, params)
         cursor.execute(query, params)
+        if self._catalog and (
+            (context is not None and context.isddl) or _ddl_statement.match(query)
+        ):
+            self._catalog.clear()
+        if (
+            self.identity_ranges
+            and context is not None
+            and getattr(context, "execute_style", None)
+            is ExecuteStyle.INSERTMANYVALUES
+        ):
+            context._collect_identity_range()
 
     def do_executemany(self, cursor, query, params, context=None):
         if query.endswith(";"):
             query = query[:-1]
-        self._debug(query, params, True)
-        cursor.executemany(query, params)
+
+        execution_options = context.execution_options if context is not None else {}
+        chunk_size = execution_options.get(
+            "executemany_chunk_size", self.executemany_chunk_size
+        )
+        max_memory = execution_options.get(
+            "executemany_max_memory", self.executemany_max_memory
+        )
+        if not chunk_size and not max_memory:
+            self._debug(query, params, True)
+            cursor.executemany(query, params)
+            return
+
+        rowcount = 0
+        for chunk in self._executemany_chunks(params, chunk_size, max_memory):
+            self._debug(query, chunk, True)
+            cursor.executemany(query, chunk)
+            if rowcount >= 0:
+                rowcount = rowcount + cursor.rowcount if cursor.rowcount >= 0 else -1
+        if context is not None:
+            context._executemany_rowcount = rowcount
+
+    def _executemany_chunks(self, params, chunk_size, max_memory):
+        """
+        Split executemany() parameters to chunks of `chunk_size` rows,
+        limited by `max_memory` bytes estimated by the first row
+        """
+        rows = iter(params)
+        chunk = list(islice(rows, 1))
+        if not chunk:
+            return
+        if max_memory:
+            row_size = sys.getsizeof(chunk[0]) + sum(
+                sys.getsizeof(value) for value in chunk[0]
+            )
+            chunk_size = min(chunk_size or max_memory, max(1, max_memory // row_size))
+        chunk += islice(rows, chunk_size - 1)
+        while chunk:
+            yield chunk
+            chunk = list(islice(rows, chunk_size))
+
+    def iris_load(self, connection, table, source, **kw):
+        """
+        Bulk load of rows or a CSV file into `table` with LOAD DATA,
+        see `sqlalchemy_iris.bulk.iris_load()`
+        """
+        return iris_load(connection, table, source, **kw)
 
     def do_begin(self, connection):
         pass
@@ -1113,10 +1570,45 @@ There are no access to %Dictionary, may be required for some advanced features,
         schema_names = [r[0] for r in connection.execute(s)]
         return schema_names
 
+    def _catalog_objects(self, connection, schema_name):
+        return self._catalog_snapshot(connection, schema_name)[0]
+
+    def _catalog_snapshot(self, connection, schema_name):
+        """
+        Names and types of all the objects of the schema, selected once,
+        and kept until DDL is executed with `catalog_snapshot=True`
+        """
+        snapshot = self._catalog.get(str(schema_name))
+        if snapshot is None:
+            tables = ischema.tables
+            # in the order of the server, SQLUPPER collation of the names,
+            # as get_table_names() and get_view_names() without the snapshot
+            s = (
+                sql.select(tables.c.table_name, tables.c.table_type)
+                .where(
+                    tables.c.table_schema == str(schema_name),
+                )
+                .order_by(tables.c.table_name)
+            )
+            objects = connection.execute(s).all()
+            # names in SQL are not case sensitive
+            names = set(table_name.upper() for table_name, _ in objects)
+            snapshot = self._catalog[str(schema_name)] = (objects, names)
+        return snapshot
+
+    def _catalog_names(self, connection, schema_name, table_type):
+        return [
+            table_name
+            for table_name, type_ in self._catalog_objects(connection, schema_name)
+            if type_ == table_type
+        ]
+
     @reflection.cache
     def get_table_names(self, connection, schema=None, **kw):
         tables = ischema.tables
         schema_name = self.get_schema(schema)
+        if self.catalog_snapshot:
+            return self._catalog_names(connection, schema_name, "BASE TABLE")
         s = (
             sql.select(tables.c.table_name)
             .where(
@@ -1150,6 +1642,9 @@ There are no access to %Dictionary, may be required for some advanced features,
     def has_table(self, connection, table_name, schema=None, **kw):
         tables = ischema.tables
         schema_name = self.get_schema(schema)
+        if self.catalog_snapshot:
+            _, names = self._catalog_snapshot(connection, schema_name)
+            return str(table_name).upper() in names
 
         s = sql.select(func.count()).where(
             sql.and_(
@@ -1159,20 +1654,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         )
         return bool(connection.execute(s).scalar())
 
-    def _get_all_objects(self, connection, schema, filter_names, scope, kind, **kw):
-        tables = ischema.tables
-        schema_name = self.get_schema(schema)
-
-        s = (
-            sql.select(
-                tables.c.table_name,
-            )
-            .select_from(tables)
-            .where(
-                tables.c.table_schema == str(schema_name),
-            )
-        )
-
+    def _table_types(self, scope, kind):
         table_types = []
         if ObjectScope.TEMPORARY in scope and ObjectKind.TABLE in kind:
             table_types.append("GLOBAL TEMPORARY")
@@ -1180,16 +1662,77 @@ There are no access to %Dictionary, may be required for some advanced features,
             table_types.append("VIEW")
         if ObjectScope.DEFAULT in scope and ObjectKind.TABLE in kind:
             table_types.append("BASE TABLE")
+        return table_types
+
+    def _objects_filter(
+        self, table_name, schema_name, all_objects, filter_names, scope, kind
+    ):
+        """
+        Condition on `table_name` column to select reflected objects,
+        list of names when filtered, otherwise not correlated subquery
+        on all the objects of the schema, so whole schema is reflected
+        with one statement, whatever the number of tables.
+        Long lists of names are replaced by the subquery as well,
+        and rows of other tables are skipped by the caller
+        """
+        if filter_names and len(all_objects) <= self.reflection_filter_max_names:
+            return table_name.in_(all_objects)
+        tables = ischema.tables
+        return table_name.in_(
+            sql.select(tables.c.table_name).where(
+                tables.c.table_schema == str(schema_name),
+                tables.c.table_type.in_(self._table_types(scope, kind)),
+            )
+        )
+
+    def _get_all_objects(
+        self, connection, schema, filter_names, scope, kind, info_cache=None, **kw
+    ):
+        """
+        Names of the objects to reflect. All the objects of the schema
+        are selected once per Inspector and shared by all get_multi_* methods,
+        only a short list of names is selected directly
+        """
+        tables = ischema.tables
+        schema_name = self.get_schema(schema)
 
+        table_types = self._table_types(scope, kind)
         if not table_types:
             return []
-        s = s.where(tables.c.table_type.in_(table_types))
 
-        if filter_names:
-            s = s.where(tables.c.table_name.in_([str(name) for name in filter_names]))
-
-        result = connection.execute(s).scalars()
-        return result.all()
+        key = ("iris_all_objects", str(schema_name))
+        objects = info_cache.get(key) if info_cache is not None else None
+        if objects is None and self.catalog_snapshot:
+            objects = self._catalog_objects(connection, schema_name)
+        if objects is None and filter_names:
+            if len(filter_names) <= self.reflection_filter_max_names:
+                s = sql.select(tables.c.table_name).where(
+                    tables.c.table_schema == str(schema_name),
+                    tables.c.table_type.in_(table_types),
+                    tables.c.table_name.in_([str(name) for name in filter_names]),
+                )
+                return connection.execute(s).scalars().all()
+
+        if objects is None:
+            # in the order of the server, SQLUPPER collation of the names,
+            # as get_table_names() and get_view_names() without the snapshot
+            s = (
+                sql.select(tables.c.table_name, tables.c.table_type)
+                .where(
+                    tables.c.table_schema == str(schema_name),
+                )
+                .order_by(tables.c.table_name)
+            )
+            objects = connection.execute(s).all()
+            if info_cache is not None:
+                info_cache[key] = objects
+
+        names = set(str(name) for name in filter_names) if filter_names else None
+        return [
+            table_name
+            for table_name, table_type in objects
+            if table_type in table_types and (names is None or table_name in names)
+        ]
 
     @reflection.cache
     def get_indexes(self, connection, table_name, schema=None, unique=False, **kw):
@@ -1204,6 +1747,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         )
         return self._value_or_raise(data, table_name, schema)
 
+    @cached_reflection
     def get_multi_indexes(
         self, connection, schema, filter_names, scope, kind, unique=False, **kw
     ):
@@ -1213,7 +1757,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         index_def = ischema.index_definition
 
         all_objects = self._get_all_objects(
-            connection, schema, filter_names, scope, kind
+            connection, schema, filter_names, scope, kind, **kw
         )
         if not all_objects:
             return util.defaultdict(list)
@@ -1231,7 +1775,14 @@ There are no access to %Dictionary, may be required for some advanced features,
             .where(
                 sql.and_(
                     indexes.c.table_schema == str(schema_name),
-                    indexes.c.table_name.in_(all_objects),
+                    self._objects_filter(
+                        indexes.c.table_name,
+                        schema_name,
+                        all_objects,
+                        filter_names,
+                        scope,
+                        kind,
+                    ),
                     indexes.c.primary_key == sql.false(),
                 )
             )
@@ -1247,21 +1798,25 @@ There are no access to %Dictionary, may be required for some advanced features,
         if self._dictionary_access:
             s = s.add_columns(
                 index_def.c.Data,
-            ).outerjoin(
-                index_def,
-                sql.and_(
-                    index_def.c.SqlName == indexes.c.index_name,
-                    index_def.c.parent
-                    == sql.select(tables.c.classname)
-                    .where(
-                        indexes.c.table_name == tables.c.table_name,
-                        indexes.c.table_schema == tables.c.table_schema,
-                    )
-                    .scalar_subquery(),
-                ),
+                index_def.c.TypeClass,
+                index_def.c.ID,
+            ).select_from(
+                indexes.join(
+                    tables,
+                    sql.and_(
+                        tables.c.table_schema == indexes.c.table_schema,
+                        tables.c.table_name == indexes.c.table_name,
+                    ),
+                ).outerjoin(
+                    index_def,
+                    sql.and_(
+                        index_def.c.parent == tables.c.classname,
+                        index_def.c.SqlName == indexes.c.index_name,
+                    ),
+                )
             )
         else:
-            s = s.add_columns(None)
+            s = s.add_columns(None, None, None)
 
         rs = connection.execute(s)
 
@@ -1272,6 +1827,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         for table_name in all_objects:
             indexes[(schema, table_name)] = default()
 
+        index_classes = {}
         for row in rs:
             (
                 idxtable,
@@ -1281,6 +1837,8 @@ There are no access to %Dictionary, may be required for some advanced features,
                 nuniq,
                 _,
                 include,
+                typeclass,
+                idxid,
             ) = row
 
             if (schema, idxtable) not in indexes:
@@ -1294,6 +1852,8 @@ There are no access to %Dictionary, may be required for some advanced features,
                     indexrec["unique"] = not nuniq
                 else:
                     indexrec["duplicates_index"] = idxname
+                if typeclass:
+                    index_classes[idxid] = indexrec
 
             indexrec["column_names"].append(self.normalize_name(colname))
             include = include.split(",") if include else []
@@ -1302,6 +1862,9 @@ There are no access to %Dictionary, may be required for some advanced features,
             if include:
                 indexrec["dialect_options"] = {"iris_include": include}
 
+        if index_classes:
+            self._reflect_index_classes(connection, index_classes)
+
         for schema, idxtable, idxname in flat_indexes:
             indexes[(schema, idxtable)].append(
                 flat_indexes[(schema, idxtable, idxname)]
@@ -1309,6 +1872,43 @@ There are no access to %Dictionary, may be required for some advanced features,
 
         return indexes
 
+    def _reflect_index_classes(self, connection, index_classes):
+        """
+        Index with a class other than the default one, such as HNSW for vectors
+        `Index ... As %SQL.Vector.HNSWIndex [ Parameters = (M = 16, Distance = "Cosine") ]`
+        is reflected as `iris_using="HNSW", iris_with={"M": 16, "Distance": "Cosine"}`
+        """
+        index_def = ischema.index_definition
+        index_params = ischema.index_definition_parameters
+
+        rs = connection.execute(
+            sql.select(
+                index_def.c.ID,
+                index_def.c.TypeClass,
+                index_params.c.element_key,
+                index_params.c.Parameters,
+            )
+            .select_from(index_def)
+            .outerjoin(
+                index_params, index_params.c.IndexDefinition == index_def.c.ID
+            )
+            .where(index_def.c.ID.in_(list(index_classes)))
+        )
+        for idxid, typeclass, name, value in rs:
+            indexrec = index_classes[idxid]
+            dialect_options = indexrec.setdefault("dialect_options", {})
+            using = typeclass
+            if using.startswith("%SQL.Vector.") and using.endswith("Index"):
+                using = using[len("%SQL.Vector.") : -len("Index")]
+            dialect_options["iris_using"] = using
+            if name is None:
+                continue
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1].replace('""', '"')
+            elif value.isdigit():
+                value = int(value)
+            dialect_options.setdefault("iris_with", {})[name] = value
+
     def get_pk_constraint(self, connection, table_name, schema=None, **kw):
         data = self.get_multi_pk_constraint(
             connection,
@@ -1320,6 +1920,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         )
         return self._value_or_raise(data, table_name, schema)
 
+    @cached_reflection
     def get_multi_pk_constraint(
         self,
         connection,
@@ -1334,7 +1935,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         constraints = ischema.constraints
 
         all_objects = self._get_all_objects(
-            connection, schema, filter_names, scope, kind
+            connection, schema, filter_names, scope, kind, **kw
         )
         if not all_objects:
             return util.defaultdict(list)
@@ -1355,7 +1956,14 @@ There are no access to %Dictionary, may be required for some advanced features,
             .where(
                 sql.and_(
                     key_constraints.c.table_schema == str(schema_name),
-                    key_constraints.c.table_name.in_(all_objects),
+                    self._objects_filter(
+                        key_constraints.c.table_name,
+                        schema_name,
+                        all_objects,
+                        filter_names,
+                        scope,
+                        kind,
+                    ),
                     constraints.c.constraint_type == "PRIMARY KEY",
                 )
             )
@@ -1440,6 +2048,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         )
         return self._value_or_raise(data, table_name, schema)
 
+    @cached_reflection
     def get_multi_foreign_keys(
         self,
         connection,
@@ -1455,7 +2064,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         key_constraints_ref = aliased(ischema.key_constraints)
 
         all_objects = self._get_all_objects(
-            connection, schema, filter_names, scope, kind
+            connection, schema, filter_names, scope, kind, **kw
         )
         if not all_objects:
             return util.defaultdict(list)
@@ -1495,7 +2104,14 @@ There are no access to %Dictionary, may be required for some advanced features,
             .where(
                 sql.and_(
                     key_constraints.c.table_schema == str(schema_name),
-                    key_constraints.c.table_name.in_(all_objects),
+                    self._objects_filter(
+                        key_constraints.c.table_name,
+                        schema_name,
+                        all_objects,
+                        filter_names,
+                        scope,
+                        kind,
+                    ),
                 )
             )
             .order_by(
@@ -1566,6 +2182,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         )
         return self._value_or_raise(data, table_name, schema)
 
+    @cached_reflection
     def get_multi_columns(
         self,
         connection,
@@ -1581,7 +2198,7 @@ There are no access to %Dictionary, may be required for some advanced features,
         property = ischema.property_definition
 
         all_objects = self._get_all_objects(
-            connection, schema, filter_names, scope, kind
+            connection, schema, filter_names, scope, kind, **kw
         )
         if not all_objects:
             return util.defaultdict(list)
@@ -1605,37 +2222,50 @@ There are no access to %Dictionary, may be required for some advanced features,
             )
             .order_by(columns.c.ordinal_position)
         )
-        if all_objects:
-            s = s.where(columns.c.table_name.in_(all_objects))
+        s = s.where(
+            self._objects_filter(
+                columns.c.table_name,
+                schema_name,
+                all_objects,
+                filter_names,
+                scope,
+                kind,
+            )
+        )
 
         if self._dictionary_access:
             s = s.add_columns(
                 property.c.SqlComputeCode,
                 property.c.Calculated,
                 property.c.Transient,
-            ).outerjoin(
-                property,
-                sql.and_(
-                    sql.or_(
-                        property.c.Name == columns.c.column_name,
-                        property.c.SqlFieldName == columns.c.column_name,
+            ).select_from(
+                columns.join(
+                    tables,
+                    sql.and_(
+                        tables.c.table_schema == columns.c.table_schema,
+                        tables.c.table_name == columns.c.table_name,
                     ),
-                    property.c.parent
-                    == sql.select(tables.c.classname)
-                    .where(
-                        columns.c.table_name == tables.c.table_name,
-                        columns.c.table_schema == tables.c.table_schema,
-                    )
-                    .scalar_subquery(),
-                ),
+                ).outerjoin(
+                    property,
+                    sql.and_(
+                        property.c.parent == tables.c.classname,
+                        sql.or_(
+                            property.c.Name == columns.c.column_name,
+                            property.c.SqlFieldName == columns.c.column_name,
+                        ),
+                    ),
+                )
             )
 
         c = connection.execution_options(future_result=True).execute(s)
 
         cols = util.defaultdict(list)
 
+        all_objects = set(all_objects)
         for row in c.mappings():
             table_name = row[columns.c.table_name]
+            if table_name not in all_objects:
+                continue
             name = row[columns.c.column_name]
             type_ = row[columns.c.data_type].upper()
             nullable = row[columns.c.is_nullable]
@@ -1714,6 +2344,8 @@ There are no access to %Dictionary, may be required for some advanced features,
     @reflection.cache
     def get_view_names(self, connection, schema=None, **kw):
         schema_name = self.get_schema(schema)
+        if self.catalog_snapshot:
+            return self._catalog_names(connection, schema_name, "VIEW")
         views = ischema.views
         s = (
             sql.select(views.c.table_name)
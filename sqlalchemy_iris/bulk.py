@@ -0,0 +1,302 @@
+"""
+Bulk load of rows or CSV files into a table with IRIS `LOAD DATA`
+
+    stats = iris_load(conn, orders, rows, columns=["id", "total", "created"])
+    print(stats.rows, stats.rejected, stats.rows_per_second, stats.method)
+
+    stats = iris_load(conn, orders, "/data/orders.csv", header=True)
+
+Rows are staged into a CSV file, loaded with `LOAD %NOINDEX %NOCHECK DATA`,
+and the indexes of the table are built once at the end.
+The file has to be readable by the server under the same path, which is the
+case for a local server, or a directory shared with it, passed as `directory`.
+When the server can not load the file, a warning with the error of the server
+is emitted and the rows of the source are inserted with executemany()
+in chunks of `chunk_size` rows instead.
+Empty strings are loaded as NULL, binary values can not be staged.
+
+Rows inserted with the statements of the dialect can skip the maintenance
+of indexes in the same way, the indexes are built once when the block succeeds
+
+    with iris_bulk_mode(conn, orders) as conn:
+        conn.execute(orders.insert(), rows)
+"""
+
+import collections
+import collections.abc
+import contextlib
+import csv
+import datetime
+import os
+import tempfile
+import time
+
+from sqlalchemy import exc
+from sqlalchemy import util
+from sqlalchemy.sql import sqltypes
+
+from .types import _parse_date
+from .types import _parse_datetime
+from .types import _parse_time
+
+Load = collections.namedtuple(
+    "Load", ["rows", "rejected", "seconds", "rows_per_second", "method"]
+)
+
+_csv_options = dict(
+    delimiter=",", quoting=csv.QUOTE_MINIMAL, doublequote=False, escapechar="\\"
+)
+
+
+def _csv_value(column, value):
+    if value is None:
+        return ""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        raise exc.ArgumentError(
+            "Binary value of column %r can not be staged in a CSV file, "
+            "insert these rows with executemany()" % column.key
+        )
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(" ")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _parser(type_):
+    """
+    Function to get the value of a column from the text of the CSV file
+    """
+    if isinstance(type_, sqltypes.Boolean):
+        return lambda value: int(value) > 0
+    if isinstance(type_, sqltypes.Time):
+        return _parse_time
+    if isinstance(type_, sqltypes.DateTime):
+        return _parse_datetime
+    if isinstance(type_, sqltypes.Date):
+        return _parse_date
+    return None
+
+
+def _columns(table, columns):
+    if columns is None:
+        return list(table.columns)
+    return [
+        table.columns[column] if isinstance(column, str) else column
+        for column in columns
+    ]
+
+
+def _rows(source, columns, header):
+    """
+    Rows of the source as sequences of values in the order of `columns`,
+    and whether the values are the text of a CSV file
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return _file_rows(source, header), True
+    if hasattr(source, "read"):
+        rows = csv.reader(source, **_csv_options)
+        if header:
+            next(rows, None)
+        return rows, True
+
+    keys = [column.key for column in columns]
+
+    def rows():
+        for row in source:
+            if hasattr(row, "_mapping"):
+                row = row._mapping
+            if isinstance(row, collections.abc.Mapping):
+                yield [row.get(key) for key in keys]
+            else:
+                yield row
+
+    return rows(), False
+
+
+def _file_rows(path, header):
+    with open(path, newline="") as f:
+        rows = csv.reader(f, **_csv_options)
+        if header:
+            next(rows, None)
+        yield from rows
+
+
+def _stage(rows, columns, directory):
+    fd, path = tempfile.mkstemp(dir=directory, prefix="iris_load_", suffix=".csv")
+    count = 0
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            writer = csv.writer(f, **_csv_options)
+            for row in rows:
+                writer.writerow(
+                    [_csv_value(column, value) for column, value in zip(columns, row)]
+                )
+                count += 1
+    except BaseException:
+        os.unlink(path)
+        raise
+    # the server may run as another user
+    os.chmod(path, 0o644)
+    return path, count
+
+
+def _load_data(connection, table, columns, path, header):
+    preparer = connection.dialect.identifier_preparer
+    using = '{"from":{"file":{"header":%s,"columnseparator":",","escapechar":"\\\\"}}}'
+    result = connection.exec_driver_sql(
+        "LOAD %%NOINDEX %%NOCHECK DATA FROM FILE '%s' INTO %s (%s) USING %s"
+        % (
+            os.path.abspath(path).replace("'", "''"),
+            preparer.format_table(table),
+            ", ".join(preparer.format_column(column) for column in columns),
+            using % ("true" if header else "false"),
+        )
+    )
+    return result.rowcount
+
+
+def _build_indexes(connection, table):
+    preparer = connection.dialect.identifier_preparer
+    connection.exec_driver_sql(
+        "BUILD INDEX FOR TABLE %s" % preparer.format_table(table)
+    )
+
+
+def _executemany(connection, table, columns, rows, from_text, chunk_size):
+    parsers = [_parser(column.type) if from_text else None for column in columns]
+    keys = [column.key for column in columns]
+    statement = table.insert()
+    count = 0
+    chunk = []
+    for row in rows:
+        values = {}
+        for key, parse, value in zip(keys, parsers, row):
+            if from_text and value == "":
+                value = None
+            elif parse is not None:
+                value = parse(value)
+            values[key] = value
+        chunk.append(values)
+        if len(chunk) >= chunk_size:
+            connection.execute(statement, chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(statement, chunk)
+        count += len(chunk)
+    return count
+
+
+def iris_load(
+    connection,
+    table,
+    source,
+    columns=None,
+    header=False,
+    directory=None,
+    chunk_size=10000,
+    build_indexes=True,
+    fallback=True,
+):
+    """
+    Load `source` into `table`, an iterable of rows, as sequences in the order
+    of `columns`, mappings or result rows, a CSV file object or a path to it.
+    `columns` are the names or columns of the table in the rows, all by default.
+    With `fallback`, rows of an iterator or a file object are kept in memory,
+    to be inserted with executemany() when the server can not load the file.
+    Returns the number of loaded rows, of rows rejected by LOAD DATA,
+    the rows of the source not counted by the server, the time, rows per second,
+    and "load data" or "executemany", the way the rows were loaded.
+    Counts are None when neither the driver nor the file tells them
+    """
+    columns = _columns(table, columns)
+    started = time.perf_counter()
+    staged = None
+    rows = None
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            path = source
+            count = None
+        else:
+            rows, from_text = _rows(source, columns, header)
+            if fallback and not isinstance(source, collections.abc.Sequence):
+                rows = list(rows)
+            staged, count = _stage(rows, columns, directory)
+            path = staged
+
+        try:
+            loaded = _load_data(
+                connection, table, columns, path, header and staged is None
+            )
+        except exc.DBAPIError as e:
+            if not fallback:
+                raise
+            util.warn(
+                "LOAD DATA of %s failed, rows are inserted with executemany(): %s"
+                % (table.fullname, e.orig)
+            )
+            loaded = None
+    finally:
+        if staged is not None:
+            os.unlink(staged)
+
+    if loaded is None:
+        method = "executemany"
+        if not isinstance(rows, list):
+            rows, from_text = _rows(source, columns, header)
+        loaded = _executemany(connection, table, columns, rows, from_text, chunk_size)
+        rejected = 0
+    else:
+        method = "load data"
+        if count is None and os.path.isfile(path):
+            # a path may also be readable by the server only
+            count = sum(1 for _ in _file_rows(path, header))
+        if loaded < 0:
+            # the driver did not report the number of rows
+            loaded, rejected = count, None
+        else:
+            rejected = count - loaded if count is not None else None
+        if build_indexes:
+            _build_indexes(connection, table)
+
+    seconds = time.perf_counter() - started
+    rows_per_second = None
+    if loaded is not None:
+        rows_per_second = loaded / seconds if seconds else 0.0
+    return Load(loaded, rejected, seconds, rows_per_second, method)
+
+
+@contextlib.contextmanager
+def iris_bulk_mode(connection, table, defer_indexes=True, nolock=True, nojourn=False):
+    """
+    INSERT, UPDATE and DELETE statements for `table` executed with the
+    connection within the block get %NOINDEX, %NOLOCK and with `nojourn`,
+    %NOJOURN, which also disables the rollback of those statements.
+    Indexes of the table are stale within the block, queries using them
+    may miss the changed rows. They are built once, when the block ends
+    without an exception, otherwise they are left as they are, to be built
+    with `BUILD INDEX FOR TABLE` when the changes are kept.
+    Use the connection yielded, a copy of it with SQLAlchemy 1.4
+    """
+    keywords = []
+    if defer_indexes:
+        keywords.append("%NOINDEX")
+    if nolock:
+        keywords.append("%NOLOCK")
+    if nojourn:
+        keywords.append("%NOJOURN")
+
+    previous = connection.get_execution_options().get("iris_prefixes")
+    prefixes = dict(previous or {})
+    prefixes[table.fullname] = " ".join(keywords)
+    bulk_connection = connection.execution_options(iris_prefixes=prefixes)
+    try:
+        yield bulk_connection
+    finally:
+        if bulk_connection is connection:
+            connection.execution_options(iris_prefixes=previous)
+    if defer_indexes:
+        _build_indexes(connection, table)
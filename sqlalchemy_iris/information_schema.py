@@ -85,6 +85,16 @@ property_definition = Table(
     schema="%Dictionary",
 )
 
+compiled_class = Table(
+    "CompiledClass",
+    ischema,
+    Column("ID", String),
+    Column("SqlSchemaName", String),
+    Column("SqlTableName", String),
+    Column("TimeChanged", String),
+    schema="%Dictionary",
+)
+
 indexes = Table(
     "INDEXES",
     ischema,
@@ -105,9 +115,20 @@ indexes = Table(
 index_definition = Table(
     "IndexDefinition",
     ischema,
+    Column("ID", String),
     Column("parent", String),
     Column("SqlName", String),
     Column("Data", String),
+    Column("TypeClass", String),
+    schema="%Dictionary",
+)
+
+index_definition_parameters = Table(
+    "IndexDefinition_Parameters",
+    ischema,
+    Column("IndexDefinition", String),
+    Column("element_key", String),
+    Column("Parameters", String),
     schema="%Dictionary",
 )
 
@@ -5,10 +5,18 @@ from .base import IRISExecutionContext
 from . import intersystems_dbapi as dbapi
 from .intersystems_dbapi import connect
 from .intersystems_cursor import InterSystemsCursorFetchStrategy
+from .intersystems_cursor import InterSystemsBufferedRowCursorFetchStrategy
 
 class InterSystemsExecutionContext(IRISExecutionContext):
     cursor_fetch_strategy = InterSystemsCursorFetchStrategy()
 
+    def _setup_result_proxy(self):
+        if self._is_server_side and self.cursor.description is not None:
+            self.cursor_fetch_strategy = InterSystemsBufferedRowCursorFetchStrategy(
+                self.cursor, self.execution_options
+            )
+        return super()._setup_result_proxy()
+
 class IRISDialect_intersystems(IRISDialect):
     driver = "intersystems"
 
@@ -16,6 +24,9 @@ class IRISDialect_intersystems(IRISDialect):
 
     supports_statement_cache = True
 
+    # the driver binds datetime objects
+    binary_temporal_binds = "native"
+
     sqlcode = None
 
     @classmethod
@@ -23,6 +34,7 @@ class IRISDialect_intersystems(IRISDialect):
         return dbapi
 
     def connect(self, *cargs, **kwarg):
+        self._connect_options(kwarg)
         host = kwarg.get('hostname', 'localhost')
         port = kwarg.get('port', 1972)
         namespace = kwarg.get('namespace', 'USER')
@@ -36,40 +48,41 @@ class IRISDialect_intersystems(IRISDialect):
         isolationLevel = kwarg.get('isolationLevel', 0)
         return connect(host, port, namespace, username, password, timeout, sharedmemory, logfile, sslconfig, autoCommit, isolationLevel)
 
-    def on_connect(self):
-
-        def on_connect(conn):
-
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute(text("SELECT TO_VECTOR('1,2,3', INT, 3)"))
-                self.supports_vectors = True
-            except:  # noqa
-                self.supports_vectors = False
-            if self.supports_vectors:
-                with conn.cursor() as cursor:
-                    # Distance or similarity
-                    cursor.execute(
-                        "select vector_cosine(to_vector('1'), to_vector('1'))"
-                    )
-                    self.vector_cosine_similarity = cursor.fetchone()[0] == 0
-
-            self._dictionary_access = False
+    def _probe_features(self, conn):
+        features = {}
+        try:
             with conn.cursor() as cursor:
-                res = cursor.execute("%CHECKPRIV SELECT ON %Dictionary.PropertyDefinition")
-                self._dictionary_access = res == 0
+                cursor.execute(text("SELECT TO_VECTOR('1,2,3', INT, 3)"))
+            features["supports_vectors"] = True
+        except:  # noqa
+            features["supports_vectors"] = False
+        if features["supports_vectors"]:
+            with conn.cursor() as cursor:
+                # Distance or similarity
+                cursor.execute(
+                    "select vector_cosine(to_vector('1'), to_vector('1'))"
+                )
+                features["vector_cosine_similarity"] = cursor.fetchone()[0] == 0
+
+        with conn.cursor() as cursor:
+            res = cursor.execute("%CHECKPRIV SELECT ON %Dictionary.PropertyDefinition")
+            features["dictionary_access"] = res == 0
 
-            if not self._dictionary_access:
-                util.warn(
-                    """
+        if not features["dictionary_access"]:
+            util.warn(
+                """
 There are no access to %Dictionary, may be required for some advanced features,
  such as Calculated fields, and include columns in indexes
                 """.replace(
-                        "\n", ""
-                    )
+                    "\n", ""
                 )
+            )
+        return features
 
-        return on_connect
+    def _apply_features(self, features):
+        super()._apply_features(features)
+        if "vector_cosine_similarity" in features:
+            self.vector_cosine_similarity = features["vector_cosine_similarity"]
 
     def create_connect_args(self, url):
         opts = {}
@@ -1,8 +1,33 @@
+import array
+import collections
 from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Optional
 from sqlalchemy import CursorResult
+from sqlalchemy import exc
+from sqlalchemy.engine.cursor import BufferedRowCursorFetchStrategy
 from sqlalchemy.engine.cursor import CursorFetchStrategy
 from sqlalchemy.engine.interfaces import DBAPICursor
 
+DEFAULT_COLUMNAR_BLOCK_SIZE = 10000
+
+_array_typecodes = {
+    int: "q",
+    float: "d",
+}
+
+
+def _column_array(values):
+    kind = type(values[0])
+    typecode = _array_typecodes.get(kind)
+    if typecode is not None and all(type(value) is kind for value in values):
+        try:
+            return array.array(typecode, values)
+        except OverflowError:
+            pass
+    return list(values)
+
 
 class InterSystemsCursorFetchStrategy(CursorFetchStrategy):
 
@@ -35,3 +60,134 @@ class InterSystemsCursorFetchStrategy(CursorFetchStrategy):
             return rows
         except BaseException as e:
             self.handle_exception(result, dbapi_cursor, e)
+
+    def fetchcolumns(
+        self,
+        result: CursorResult[Any],
+        dbapi_cursor: DBAPICursor,
+        size: int,
+    ) -> Optional[List[Any]]:
+        """
+        Fetch up to `size` rows, and return them as list of columns,
+        `array.array` for int and float columns, and `list` for others
+        """
+        try:
+            rows = dbapi_cursor.fetchmany(size)
+            if not rows:
+                result._soft_close()
+                return None
+            return [_column_array(column) for column in zip(*rows)]
+        except BaseException as e:
+            self.handle_exception(result, dbapi_cursor, e)
+
+
+class InterSystemsBufferedRowCursorFetchStrategy(BufferedRowCursorFetchStrategy):
+    """
+    Server side cursor strategy, rows are copied to tuples
+    before they get into the buffer, so they stay valid after the cursor is closed
+    """
+
+    def __init__(
+        self,
+        dbapi_cursor: DBAPICursor,
+        execution_options: Any,
+        growth_factor: int = 5,
+    ) -> None:
+        super().__init__(
+            dbapi_cursor,
+            execution_options,
+            growth_factor,
+            initial_buffer=collections.deque(
+                tuple(row) for row in dbapi_cursor.fetchmany(1)
+            ),
+        )
+
+    def _buffer_rows(
+        self, result: CursorResult[Any], dbapi_cursor: DBAPICursor
+    ) -> None:
+        size = self._bufsize
+        try:
+            if size < 1:
+                new_rows = dbapi_cursor.fetchall()
+            else:
+                new_rows = dbapi_cursor.fetchmany(size)
+            new_rows = [tuple(row) for row in new_rows]
+        except BaseException as e:
+            self.handle_exception(result, dbapi_cursor, e)
+
+        if not new_rows:
+            return
+        self._rowbuffer = collections.deque(new_rows)
+        if self._growth_factor and size < self._max_row_buffer:
+            self._bufsize = min(self._max_row_buffer, size * self._growth_factor)
+
+    def fetchmany(
+        self,
+        result: CursorResult[Any],
+        dbapi_cursor: DBAPICursor,
+        size: Optional[int] = None,
+    ) -> Any:
+        if size is None:
+            return self.fetchall(result, dbapi_cursor)
+
+        rb = self._rowbuffer
+        lb = len(rb)
+        close = False
+        if size > lb:
+            try:
+                new = [tuple(row) for row in dbapi_cursor.fetchmany(size - lb)]
+            except BaseException as e:
+                self.handle_exception(result, dbapi_cursor, e)
+            else:
+                if not new:
+                    close = True
+                else:
+                    rb.extend(new)
+
+        res = [rb.popleft() for _ in range(min(size, len(rb)))]
+        if close:
+            result._soft_close()
+        return res
+
+    def fetchall(
+        self, result: CursorResult[Any], dbapi_cursor: DBAPICursor
+    ) -> Any:
+        try:
+            ret = list(self._rowbuffer) + [
+                tuple(row) for row in dbapi_cursor.fetchall()
+            ]
+            self._rowbuffer.clear()
+            result._soft_close()
+            return ret
+        except BaseException as e:
+            self.handle_exception(result, dbapi_cursor, e)
+
+
+def fetch_columns(
+    result: CursorResult[Any], block_size: Optional[int] = None
+) -> Iterator[List[Any]]:
+    """
+    Iterate over the result in blocks of columns, without creating Row per row.
+    The size of the block is `block_size`, or `columnar_block_size` execution option.
+    Values are returned as they come from the driver, type processors are not applied.
+
+        result = conn.execution_options(columnar_block_size=50000).execute(stmt)
+        for ids, amounts in fetch_columns(result):
+            ...
+    """
+    strategy = result.cursor_strategy
+    if not isinstance(strategy, InterSystemsCursorFetchStrategy):
+        raise exc.InvalidRequestError(
+            "Columnar fetch is only available for results of iris+intersystems"
+        )
+    if block_size is None:
+        block_size = result.context.execution_options.get(
+            "columnar_block_size", DEFAULT_COLUMNAR_BLOCK_SIZE
+        )
+    dbapi_cursor = result.cursor
+    dbapi_cursor.arraysize = block_size
+    while True:
+        columns = strategy.fetchcolumns(result, dbapi_cursor, block_size)
+        if columns is None:
+            return
+        yield columns
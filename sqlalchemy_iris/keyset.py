@@ -0,0 +1,197 @@
+"""
+Keyset (seek) pagination, the next page starts after the last row of
+the previous one, instead of numbering all the preceding rows
+
+    stmt = select(orders.c.id, orders.c.total).order_by(orders.c.total, orders.c.id)
+
+    page = paginate(conn, stmt, 50)
+    while page.next_cursor:
+        page = paginate(conn, stmt, 50, cursor=page.next_cursor)
+
+The page after the cursor is `SELECT TOP 50 ... WHERE total > :total
+OR (total = :total AND id > :id)`, which can use an index on the ordered
+columns. The ordered columns must be selected, NOT NULL, cover a primary
+key or a unique constraint and come from a single table, otherwise pages
+are read with OFFSET, and ROW_NUMBER(), as before.
+"""
+
+import base64
+import binascii
+import collections
+import datetime
+import decimal
+import json
+
+from sqlalchemy import exc
+from sqlalchemy import schema
+from sqlalchemy import sql
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from .fanout import _column_index
+
+Page = collections.namedtuple("Page", ["rows", "next_cursor"])
+
+_direction_modifiers = {
+    operators.asc_op: False,
+    operators.desc_op: True,
+}
+
+_value_types = (
+    ("datetime", datetime.datetime, datetime.datetime.fromisoformat),
+    ("date", datetime.date, datetime.date.fromisoformat),
+    ("time", datetime.time, datetime.time.fromisoformat),
+    ("decimal", decimal.Decimal, decimal.Decimal),
+)
+
+
+def _encode_value(value):
+    for name, type_, _ in _value_types:
+        if isinstance(value, type_):
+            return {name: str(value) if name == "decimal" else value.isoformat()}
+    if isinstance(value, bytes):
+        return {"bytes": base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        ((name, text),) = value.items()
+        if name == "bytes":
+            return base64.b64decode(text)
+        for type_name, _, parse in _value_types:
+            if type_name == name:
+                return parse(text)
+    return value
+
+
+def encode_cursor(position):
+    """
+    Token of a position, `{"k": [values of the last row]}` or `{"o": offset}`
+    """
+    if "k" in position:
+        position = {"k": [_encode_value(value) for value in position["k"]]}
+    data = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(data)
+    except (binascii.Error, ValueError) as e:
+        raise exc.ArgumentError("Invalid pagination cursor %r" % cursor) from e
+    if not isinstance(position, dict) or not (
+        isinstance(position.get("k"), list) or isinstance(position.get("o"), int)
+    ):
+        raise exc.ArgumentError("Invalid pagination cursor %r" % cursor)
+    if "k" in position:
+        position["k"] = [_decode_value(value) for value in position["k"]]
+    return position
+
+
+def _is_unique(table, columns):
+    keys = [table.primary_key.columns]
+    keys.extend(
+        constraint.columns
+        for constraint in table.constraints
+        if isinstance(constraint, schema.UniqueConstraint)
+    )
+    keys.extend(index.columns for index in table.indexes if index.unique)
+    names = set(column.key for column in columns)
+    return any(
+        len(key) and all(column.key in names for column in key) for key in keys
+    )
+
+
+def keyset_columns(statement):
+    """
+    Ordered columns as (column, index in the row, descending),
+    or None when the order does not allow keyset pagination
+    """
+    order_by = getattr(statement, "_order_by_clauses", None)
+    if not order_by:
+        return None
+    froms = statement.get_final_froms()
+    if len(froms) != 1 or not isinstance(froms[0], schema.Table):
+        return None
+    table = froms[0]
+
+    selected = list(statement.selected_columns)
+    keys = []
+    for clause in order_by:
+        element, descending = clause, False
+        while isinstance(element, UnaryExpression):
+            if element.modifier not in _direction_modifiers:
+                # NULLS FIRST / LAST
+                return None
+            descending = _direction_modifiers[element.modifier]
+            element = element.element
+        if not isinstance(element, schema.Column) or element.table is not table:
+            return None
+        if element.nullable and not element.primary_key:
+            return None
+        index = _column_index(selected, element)
+        if index is None:
+            return None
+        keys.append((element, index, descending))
+
+    if not _is_unique(table, [column for column, _, _ in keys]):
+        return None
+    return keys
+
+
+def _after(keys, values):
+    """
+    `k1 > :v1 OR (k1 = :v1 AND k2 > :v2) ...`, `<` for descending columns
+    """
+    criteria = []
+    for i, (column, _, descending) in enumerate(keys):
+        equal = [
+            previous == sql.bindparam(None, value, type_=previous.type)
+            for (previous, _, _), value in zip(keys[:i], values)
+        ]
+        value = sql.bindparam(None, values[i], type_=column.type)
+        criteria.append(
+            sql.and_(*equal, column < value if descending else column > value)
+        )
+    return sql.or_(*criteria)
+
+
+def paginate(connection, statement, per_page, cursor=None, parameters=None):
+    """
+    Execute the page of `statement` after `cursor`, the first one without it.
+    Returns the rows and the cursor of the next page, None for the last page.
+    LIMIT and OFFSET of the statement are replaced
+    """
+    statement = statement.limit(None).offset(None)
+    position = decode_cursor(cursor) if cursor else {}
+    keys = keyset_columns(statement)
+
+    if keys is not None and "o" not in position:
+        if "k" in position:
+            if len(position["k"]) != len(keys):
+                raise exc.ArgumentError(
+                    "Pagination cursor does not match the ORDER BY of the statement"
+                )
+            statement = statement.where(_after(keys, position["k"]))
+        offset = None
+    else:
+        if "k" in position:
+            raise exc.ArgumentError(
+                "Keyset pagination cursor used with a statement paged by OFFSET"
+            )
+        offset = position.get("o", 0)
+        if offset:
+            statement = statement.offset(offset)
+
+    # one more row tells whether there is a next page
+    rows = connection.execute(statement.limit(per_page + 1), parameters).all()
+    if len(rows) <= per_page:
+        return Page(rows, None)
+    rows = rows[:per_page]
+    if offset is None:
+        next_position = {"k": [rows[-1][index] for _, index, _ in keys]}
+    else:
+        next_position = {"o": offset + per_page}
+    return Page(rows, encode_cursor(next_position))
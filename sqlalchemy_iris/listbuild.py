@@ -0,0 +1,262 @@
+"""
+Codec of $LISTBUILD values, as stored by IRISListBuild columns
+
+Each item is its length, its type and its data, lists of doubles have
+items of the same size, so they are encoded and decoded with a few slice
+copies instead of a loop in Python.
+
+    data = encode([1.0, 2.5, 3.0])
+    decode(data)                 # [1.0, 2.5, 3.0]
+    decode(data, as_array="d")   # array('d', [1.0, 2.5, 3.0])
+    items = ListBuild(data)      # items are decoded on access
+    items[1]                     # 2.5
+"""
+
+import array
+import collections.abc
+import struct
+import sys
+import threading
+from decimal import Decimal
+
+UNDEFINED = 0
+ASCII = 1
+UNICODE = 2
+POSINT = 4
+NEGINT = 5
+POSNUM = 6
+NEGNUM = 7
+DOUBLE = 8
+
+_double = struct.Struct("<d")
+_double_item = b"\x0a\x08"
+_little_endian = sys.byteorder == "little"
+
+_local = threading.local()
+
+
+def _buffer():
+    # one growing buffer per thread, reused by each encode()
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray()
+    else:
+        del buffer[:]
+    return buffer
+
+
+def _add(buffer, type_, data):
+    length = len(data) + 2
+    if length < 256:
+        buffer.append(length)
+    elif length - 1 < 65536:
+        buffer += b"\x00" + (length - 1).to_bytes(2, "little")
+    else:
+        buffer += b"\x00\x00\x00" + (length - 1).to_bytes(4, "little")
+    buffer.append(type_)
+    buffer += data
+
+
+def _int_data(value):
+    if value == 0 or value == -1:
+        return b""
+    data = value.to_bytes((value.bit_length() + 8) // 8, "little", signed=True)
+    return data.rstrip(b"\xff") if value < 0 else data
+
+
+def _add_item(buffer, item):
+    if item is None:
+        buffer.append(1)
+    elif isinstance(item, float):
+        _add(buffer, DOUBLE, _double.pack(item))
+    elif isinstance(item, int):
+        if -(2**63) <= item < 2**63:
+            _add(buffer, NEGINT if item < 0 else POSINT, _int_data(int(item)))
+        else:
+            _add(buffer, ASCII, str(item).encode("ascii"))
+    elif isinstance(item, Decimal):
+        sign, digits, exponent = item.as_tuple()
+        mantissa = int("".join(map(str, digits)) or "0")
+        if isinstance(exponent, int) and -128 <= exponent < 128 and mantissa < 2**63:
+            if sign:
+                mantissa = -mantissa
+            _add(
+                buffer,
+                NEGNUM if mantissa < 0 else POSNUM,
+                exponent.to_bytes(1, "little", signed=True) + _int_data(mantissa),
+            )
+        else:
+            _add(buffer, ASCII, str(item).encode("ascii"))
+    elif isinstance(item, (bytes, bytearray, memoryview)):
+        _add(buffer, ASCII, bytes(item))
+    else:
+        text = str(item)
+        try:
+            _add(buffer, ASCII, text.encode("latin-1"))
+        except UnicodeEncodeError:
+            _add(buffer, UNICODE, text.encode("utf-16-le"))
+
+
+def _encode_doubles(buffer, items):
+    count = len(items)
+    data = array.array("d", items)
+    if not _little_endian:
+        data.byteswap()
+    data = memoryview(data).cast("B")
+    start = len(buffer)
+    buffer += bytes(10 * count)
+    buffer[start::10] = b"\x0a" * count
+    buffer[start + 1 :: 10] = b"\x08" * count
+    for i in range(8):
+        buffer[start + 2 + i :: 10] = data[i::8]
+
+
+def encode(items, buffer=None):
+    """
+    $LISTBUILD of `items`, a list, a tuple or an array.array,
+    appended to `buffer` when given, bytes otherwise
+    """
+    result = buffer
+    if buffer is None:
+        buffer = _buffer()
+    if isinstance(items, array.array) and items.typecode in "fd":
+        _encode_doubles(buffer, items)
+    elif items and all(type(item) is float for item in items):
+        _encode_doubles(buffer, items)
+    else:
+        for item in items:
+            _add_item(buffer, item)
+    return result if result is not None else bytes(buffer)
+
+
+def _item(data, offset):
+    """
+    Type of the item at `offset`, start and end of its data
+    """
+    length = data[offset]
+    if length:
+        return (data[offset + 1] if length > 1 else UNDEFINED), offset + 2, offset + length
+    length = int.from_bytes(data[offset + 1 : offset + 3], "little")
+    if length:
+        return data[offset + 3], offset + 4, offset + 3 + length
+    length = int.from_bytes(data[offset + 3 : offset + 7], "little")
+    return data[offset + 7], offset + 8, offset + 7 + length
+
+
+def _value(data, type_, start, end):
+    if type_ == DOUBLE:
+        return _double.unpack_from(data, start)[0]
+    if type_ == POSINT:
+        return int.from_bytes(data[start:end], "little")
+    if type_ == NEGINT:
+        return int.from_bytes(bytes(data[start:end]) + b"\xff", "little", signed=True)
+    if type_ == POSNUM or type_ == NEGNUM:
+        exponent = int.from_bytes(data[start : start + 1], "little", signed=True)
+        if type_ == POSNUM:
+            mantissa = int.from_bytes(data[start + 1 : end], "little")
+        else:
+            mantissa = int.from_bytes(
+                bytes(data[start + 1 : end]) + b"\xff", "little", signed=True
+            )
+        return Decimal(mantissa).scaleb(exponent)
+    if type_ == ASCII:
+        return bytes(data[start:end]).decode("latin-1")
+    if type_ == UNICODE:
+        return bytes(data[start:end]).decode("utf-16-le")
+    if type_ == UNDEFINED:
+        return None
+    raise ValueError("unsupported $LIST item type %d" % type_)
+
+
+def _offsets(data):
+    offsets = []
+    offset = 0
+    size = len(data)
+    while offset < size:
+        offsets.append(offset)
+        offset = _item(data, offset)[2]
+    return offsets
+
+
+def _decode_doubles(data):
+    """
+    array('d') of a list of doubles only, None for other lists
+    """
+    size = len(data)
+    if size % 10:
+        return None
+    count = size // 10
+    if data[0::10] != b"\x0a" * count or data[1::10] != b"\x08" * count:
+        return None
+    raw = bytearray(8 * count)
+    for i in range(8):
+        raw[i::8] = data[2 + i :: 10]
+    values = array.array("d", raw)
+    if not _little_endian:
+        values.byteswap()
+    return values
+
+
+def decode(data, as_array=None):
+    """
+    Items of a $LISTBUILD value as a list, or as array.array of type code
+    `as_array`, such as "d" or "q", for numeric lists
+    """
+    data = memoryview(data).cast("B")
+    doubles = _decode_doubles(data) if len(data) else array.array("d")
+    if doubles is not None:
+        if as_array is None:
+            return doubles.tolist()
+        return doubles if as_array == "d" else array.array(as_array, doubles)
+
+    items = [_value(data, *_item(data, offset)) for offset in _offsets(data)]
+    return items if as_array is None else array.array(as_array, items)
+
+
+class ListBuild(collections.abc.Sequence):
+    """
+    Read only sequence over a $LISTBUILD value, only offsets of items are
+    found when the length is needed, and items are decoded when accessed
+    """
+
+    __slots__ = ("_data", "_offsets")
+
+    def __init__(self, data):
+        self._data = memoryview(data).cast("B")
+        self._offsets = None
+
+    def _index(self):
+        if self._offsets is None:
+            self._offsets = _offsets(self._data)
+        return self._offsets
+
+    def __len__(self):
+        return len(self._index())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        offsets = self._index()
+        return _value(self._data, *_item(self._data, offsets[index]))
+
+    def __iter__(self):
+        data = self._data
+        offset = 0
+        size = len(data)
+        while offset < size:
+            type_, start, end = _item(data, offset)
+            yield _value(data, type_, start, end)
+            offset = end
+
+    def __eq__(self, other):
+        if isinstance(other, ListBuild):
+            return self._data == other._data
+        if isinstance(other, (list, tuple, array.array)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return "ListBuild(%r)" % (list(self),)
+
+    def tobytes(self):
+        return self._data.tobytes()
@@ -0,0 +1,197 @@
+"""
+Process wide cache of reflected schemas
+
+Entries are kept per server, namespace and schema, and are dropped as soon as
+any class of the schema is compiled, created or deleted, which is what
+happens to the classes projected by CREATE, ALTER and DROP statements.
+The state of the schema is taken from %Dictionary.CompiledClass,
+it costs one query per Inspector, instead of the queries of the reflection.
+
+    engine = create_engine(url, reflection_cache=True)
+    engine = create_engine(
+        url, reflection_cache=True, reflection_cache_path="~/.cache/iris-reflection"
+    )
+
+With `reflection_cache_path`, results are also stored in that folder, one
+file per reflection call, and reused by other processes of the same user as
+long as the schema did not change. Results are pickled, with reflected types,
+so the folder has to be private: it is created with mode 0700, and it is not
+used, with a warning, when it is owned by another user or other users can
+write to it.
+"""
+
+import copy
+import functools
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import threading
+
+from sqlalchemy import func
+from sqlalchemy import sql
+from sqlalchemy import util
+
+from . import information_schema as ischema
+
+_lock = threading.Lock()
+_schemas = {}
+# folders already checked, and whether they are private
+_paths = {}
+
+
+def _schema_key(connection, schema_name):
+    url = connection.engine.url
+    return (url.host, url.port, url.database, str(schema_name))
+
+
+def schema_stamp(connection, schema_name, info_cache=None):
+    """
+    Number of classes in the schema and the last time one of them was changed
+    """
+    key = ("iris_schema_stamp", str(schema_name))
+    if info_cache is not None and key in info_cache:
+        return info_cache[key]
+    compiled_class = ischema.compiled_class
+    count, changed = connection.execute(
+        sql.select(func.count(), func.max(compiled_class.c.TimeChanged)).where(
+            compiled_class.c.SqlSchemaName == str(schema_name)
+        )
+    ).one()
+    stamp = (count, changed)
+    if info_cache is not None:
+        info_cache[key] = stamp
+    return stamp
+
+
+def _is_private(path):
+    if not hasattr(os, "getuid"):
+        # permissions of the folder can not be checked
+        return False
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(info.st_mode)
+        and info.st_uid == os.getuid()
+        and not info.st_mode & 0o022
+    )
+
+
+def _private_path(path):
+    """
+    Expanded `path`, or None when it can not be trusted
+    """
+    path = os.path.expanduser(path)
+    private = _paths.get(path)
+    if private is None:
+        private = _paths[path] = _is_private(path)
+        if not private:
+            util.warn(
+                "reflection_cache_path %r is not a folder private to the user "
+                "of the process, it is not used" % path
+            )
+    return path if private else None
+
+
+def _cache_file(path, file_key):
+    name = hashlib.sha1(repr(file_key).encode("utf-8")).hexdigest()
+    return os.path.join(path, "%s.pickle" % name)
+
+
+def _load(path, file_key, stamp):
+    try:
+        with open(_cache_file(path, file_key), "rb") as f:
+            if os.fstat(f.fileno()).st_uid != os.getuid():
+                return None
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    if entry.get("key") != file_key or entry.get("stamp") != stamp:
+        return None
+    return entry["value"]
+
+
+def _save(path, file_key, stamp, value):
+    fd, tmp = tempfile.mkstemp(dir=path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"key": file_key, "stamp": stamp, "value": value}, f)
+        os.replace(tmp, _cache_file(path, file_key))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _call_key(fn, schema, filter_names, scope, kind, kw):
+    return (
+        fn.__name__,
+        schema,
+        tuple(str(name) for name in filter_names) if filter_names else None,
+        scope,
+        kind,
+        tuple(
+            sorted(
+                (k, v)
+                for k, v in kw.items()
+                if isinstance(v, (str, int, bool, type(None)))
+            )
+        ),
+    )
+
+
+def cached_reflection(fn):
+    """
+    Cache the result of a get_multi_* reflection method,
+    when the dialect is created with `reflection_cache=True`
+    """
+
+    @functools.wraps(fn)
+    def decorated(self, connection, schema, filter_names, scope, kind, **kw):
+        if not self.reflection_cache or not self._dictionary_access:
+            return fn(self, connection, schema, filter_names, scope, kind, **kw)
+
+        schema_name = self.get_schema(schema)
+        schema_key = _schema_key(connection, schema_name)
+        stamp = schema_stamp(connection, schema_name, kw.get("info_cache"))
+        key = _call_key(fn, schema, filter_names, scope, kind, kw)
+
+        with _lock:
+            entry = _schemas.get(schema_key)
+        if entry is not None and entry["stamp"] == stamp and key in entry["data"]:
+            return copy.deepcopy(entry["data"][key])
+
+        path = self.reflection_cache_path
+        if path:
+            path = _private_path(path)
+        value = _load(path, (schema_key, key), stamp) if path else None
+        if value is None:
+            value = list(
+                dict(
+                    fn(self, connection, schema, filter_names, scope, kind, **kw)
+                ).items()
+            )
+            if path:
+                # only the result of this call is written, outside of the lock
+                _save(path, (schema_key, key), stamp, value)
+
+        with _lock:
+            entry = _schemas.get(schema_key)
+            if entry is None or entry["stamp"] != stamp:
+                entry = _schemas[schema_key] = {"stamp": stamp, "data": {}}
+            entry["data"][key] = copy.deepcopy(value)
+        return value
+
+    return decorated
+
+
+def clear():
+    """
+    Drop all the entries kept in memory
+    """
+    with _lock:
+        _schemas.clear()
+        _paths.clear()
@@ -269,3 +269,28 @@ class Requirements(SuiteRequirements, AlembicRequirements):
     @property
     def iris_vector(self):
         return only_on(lambda config: self._iris_vector(config))
+
+    def _iris_shared_files(self, config):
+        import os
+        import tempfile
+
+        from sqlalchemy import exc
+
+        fd, path = tempfile.mkstemp(prefix="iris_shared_", suffix=".csv")
+        os.close(fd)
+        try:
+            with config.db.connect() as conn:
+                names = conn.exec_driver_sql(
+                    "SELECT Name FROM %%Library.File_FileSet('%s', '%s')"
+                    % (os.path.dirname(path), os.path.basename(path))
+                ).scalars()
+                return any(os.path.basename(name) == os.path.basename(path) for name in names)
+        except exc.DBAPIError:
+            return False
+        finally:
+            os.unlink(path)
+
+    @property
+    def iris_shared_files(self):
+        """the server reads files written by the client under the same path"""
+        return only_on(lambda config: self._iris_shared_files(config))
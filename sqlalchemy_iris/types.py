@@ -1,15 +1,80 @@
+import array
 import datetime
+import re
 from decimal import Decimal
+from functools import lru_cache
 from sqlalchemy import func, text
+from sqlalchemy import literal_column, select, union_all
 from sqlalchemy.sql import sqltypes
 from sqlalchemy.types import UserDefinedType
 from uuid import UUID as _python_UUID
-from intersystems_iris import IRISList
 from sqlalchemy import __version__ as sqlalchemy_version
 
+from . import listbuild
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 HOROLOG_ORDINAL = datetime.date(1840, 12, 31).toordinal()
 
 
+_date_re = re.compile(r"(\d{4})-(\d\d)-(\d\d)", re.ASCII)
+_datetime_re = re.compile(
+    r"(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)(?:\.(\d+))?", re.ASCII
+)
+_time_re = re.compile(r"(\d\d):(\d\d):(\d\d)(?:\.(\d+))?", re.ASCII)
+
+
+def _micro(fraction):
+    # fraction of the second, up to microseconds
+    if not fraction:
+        return 0
+    return int(fraction[:6].ljust(6, "0"))
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value):
+    """`YYYY-MM-DD` or number of days in $HOROLOG"""
+    if isinstance(value, str) and "-" in value[1:]:
+        match = _date_re.fullmatch(value)
+        if match is not None:
+            return datetime.date(*map(int, match.groups()))
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    return datetime.date.fromordinal(int(value) + HOROLOG_ORDINAL)
+
+
+def _parse_datetime(value):
+    """`YYYY-MM-DD HH:MM:SS[.fffffffff]`"""
+    match = _datetime_re.fullmatch(value)
+    if match is not None:
+        year, month, day, hour, minute, second, fraction = match.groups()
+        return datetime.datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour),
+            int(minute),
+            int(second),
+            _micro(fraction),
+        )
+    if "." not in value:
+        value += ".0"
+    return datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+
+
+def _parse_time(value):
+    """`HH:MM:SS[.fffffffff]`"""
+    match = _time_re.fullmatch(value)
+    if match is not None:
+        hour, minute, second, fraction = match.groups()
+        return datetime.time(int(hour), int(minute), int(second), _micro(fraction))
+    if "." not in value:
+        value += ".0"
+    return datetime.datetime.strptime(value, "%H:%M:%S.%f").time()
+
+
 class IRISBoolean(sqltypes.Boolean):
     def _should_create_constraint(self, compiler, **kw):
         return False
@@ -33,13 +98,36 @@ class IRISBoolean(sqltypes.Boolean):
         return process
 
 
+def _temporal_binds(dialect):
+    """
+    "string", "native" or "logical", see `IRISDialect.temporal_binds`
+    """
+    return getattr(dialect, "temporal_binds", "string")
+
+
+def _format_datetime(value):
+    # isoformat() is much faster than strftime(), and gives the same text
+    # for naive datetime objects with four digits years
+    if (
+        type(value) is datetime.datetime
+        and value.tzinfo is None
+        and value.year >= 1000
+    ):
+        return value.isoformat(" ", "microseconds")
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
 class IRISDate(sqltypes.Date):
     def bind_processor(self, dialect):
+        temporal_binds = _temporal_binds(dialect)
+        if temporal_binds == "native":
+            return None
+
         def process(value):
             if value is None:
                 return None
             horolog = value.toordinal() - HOROLOG_ORDINAL
-            return str(horolog)
+            return horolog if temporal_binds == "logical" else str(horolog)
 
         return process
 
@@ -49,10 +137,7 @@ class IRISDate(sqltypes.Date):
                 return None
             if isinstance(value, datetime.date):
                 return value
-            if isinstance(value, str) and "-" in value[1:]:
-                return datetime.datetime.strptime(value, "%Y-%m-%d").date()
-            horolog = int(value) + HOROLOG_ORDINAL
-            return datetime.date.fromordinal(horolog)
+            return _parse_date(value)
 
         return process
 
@@ -61,11 +146,14 @@ class IRISTimeStamp(sqltypes.DateTime):
     __visit_name__ = "timestamp"
 
     def bind_processor(self, dialect):
+        if _temporal_binds(dialect) == "native":
+            return None
+
         def process(value: datetime.datetime):
             if value is not None:
                 # value = int(value.timestamp() * 1000000)
                 # value += (2 ** 60) if value > 0 else -(2 ** 61 * 3)
-                return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+                return _format_datetime(value)
             return value
 
         return process
@@ -73,9 +161,7 @@ class IRISTimeStamp(sqltypes.DateTime):
     def result_processor(self, dialect, coltype):
         def process(value):
             if isinstance(value, str):
-                if "." not in value:
-                    value += ".0"
-                return datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+                return _parse_datetime(value)
             if isinstance(value, int):
                 value -= (2**60) if value > 0 else -(2**61 * 3)
                 value = value / 1000000
@@ -89,9 +175,12 @@ class IRISDateTime(sqltypes.DateTime):
     __visit_name__ = "datetime"
 
     def bind_processor(self, dialect):
+        if _temporal_binds(dialect) == "native":
+            return None
+
         def process(value):
             if value is not None:
-                return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+                return _format_datetime(value)
             return value
 
         return process
@@ -101,9 +190,7 @@ class IRISDateTime(sqltypes.DateTime):
             if isinstance(value, datetime.datetime):
                 return value
             if isinstance(value, str):
-                if "." not in value:
-                    value += ".0"
-                return datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+                return _parse_datetime(value)
             return value
 
         return process
@@ -113,8 +200,27 @@ class IRISTime(sqltypes.DateTime):
     __visit_name__ = "time"
 
     def bind_processor(self, dialect):
+        temporal_binds = _temporal_binds(dialect)
+        if temporal_binds == "native":
+            return None
+
+        if temporal_binds == "logical":
+
+            def process(value):
+                if value is None:
+                    return None
+                # seconds since midnight, as in $HOROLOG
+                seconds = value.hour * 3600 + value.minute * 60 + value.second
+                if value.microsecond:
+                    return Decimal(seconds) + Decimal(value.microsecond).scaleb(-6)
+                return seconds
+
+            return process
+
         def process(value):
             if value is not None:
+                if type(value) is datetime.time and value.tzinfo is None:
+                    return value.isoformat("microseconds")
                 return value.strftime("%H:%M:%S.%f")
             return value
 
@@ -125,9 +231,7 @@ class IRISTime(sqltypes.DateTime):
             if isinstance(value, datetime.time):
                 return value
             if isinstance(value, str):
-                if "." not in value:
-                    value += ".0"
-                return datetime.datetime.strptime(value, "%H:%M:%S.%f").time()
+                return _parse_time(value)
             if isinstance(value, int) or isinstance(value, Decimal):
                 horolog = value
                 hour = int(horolog // 3600)
@@ -217,13 +321,29 @@ if sqlalchemy_version.startswith("2."):
 
 
 class IRISListBuild(UserDefinedType):
+    """
+    $LISTBUILD of a list, returned as a list, as `array.array` of type code
+    `as_array` for numeric lists, or with `lazy`, as a sequence which decodes
+    items when they are accessed
+    """
+
     cache_ok = True
 
-    def __init__(self, max_items: int = None, item_type: type = float):
+    def __init__(
+        self,
+        max_items: int = None,
+        item_type: type = float,
+        as_array: str = None,
+        lazy: bool = False,
+    ):
         super(UserDefinedType, self).__init__()
         self.max_items = max_items
+        self.item_type = item_type
+        self.as_array = as_array
+        self.lazy = lazy
         max_length = None
-        if type is float or type is int:
+        if max_items and item_type in (float, int):
+            # length, type and up to 8 bytes of the number
             max_length = max_items * 10
         elif max_items:
             max_length = 65535
@@ -236,22 +356,23 @@ class IRISListBuild(UserDefinedType):
 
     def bind_processor(self, dialect):
         def process(value):
-            irislist = IRISList()
             if not value:
                 return value
-            if not isinstance(value, list) and not isinstance(value, tuple):
+            if not isinstance(value, (list, tuple, array.array)):
                 raise ValueError("expected list or tuple, got '%s'" % type(value))
-            for item in value:
-                irislist.add(item)
-            return irislist.getBuffer()
+            return listbuild.encode(value)
 
         return process
 
     def result_processor(self, dialect, coltype):
+        as_array = self.as_array
+        lazy = self.lazy
+
         def process(value):
             if value:
-                irislist = IRISList(value)
-                return irislist._list_data
+                if lazy:
+                    return listbuild.ListBuild(value)
+                return listbuild.decode(value, as_array)
             return value
 
         return process
@@ -260,23 +381,52 @@ class IRISListBuild(UserDefinedType):
         def func(self, funcname: str, other):
             if not isinstance(other, list) and not isinstance(other, tuple):
                 raise ValueError("expected list or tuple, got '%s'" % type(other))
-            irislist = IRISList()
-            for item in other:
-                irislist.add(item)
-            return getattr(func, funcname)(self, irislist.getBuffer())
+            return getattr(func, funcname)(self, listbuild.encode(other))
+
+
+def _vector_text(value):
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        # formatted by numpy, with the shortest text for the dtype of the array
+        return "[" + ",".join(value.reshape(-1).astype(str).tolist()) + "]"
+    if isinstance(value, (array.array, memoryview)):
+        value = value.tolist()
+    elif not isinstance(value, (list, tuple)):
+        raise ValueError("expected list, tuple or array, got '%s'" % type(value))
+    return "[" + ",".join(map(str, value)) + "]"
 
 
 class IRISVector(UserDefinedType):
+    """
+    VECTOR of `max_items` items, returned as a list, as `array.array` with
+    `as_array`, or as `numpy.ndarray` of `dtype` with `as_numpy`.
+    Values are sent and received as `1.0,2.0,...` text in any case, the
+    drivers have no binary format for VECTOR
+    """
+
     cache_ok = True
 
-    def __init__(self, max_items: int = None, item_type: type = float):
+    def __init__(
+        self,
+        max_items: int = None,
+        item_type: type = float,
+        as_array: bool = False,
+        as_numpy: bool = False,
+        dtype: str = None,
+    ):
         super(UserDefinedType, self).__init__()
         if item_type not in [float, int, Decimal]:
             raise TypeError(
                 f"IRISVector expected int, float or Decimal; got {type.__name__}; expected: int, float, Decimal"
             )
+        if (as_array or as_numpy) and item_type is Decimal:
+            raise TypeError("IRISVector with as_array or as_numpy expected int or float")
+        if as_numpy and numpy is None:
+            raise ImportError("IRISVector with as_numpy requires numpy")
         self.max_items = max_items
         self.item_type = item_type
+        self.as_array = as_array
+        self.as_numpy = as_numpy
+        self.dtype = dtype
         item_type_server = (
             "decimal"
             if self.item_type is float
@@ -292,21 +442,38 @@ class IRISVector(UserDefinedType):
 
     def bind_processor(self, dialect):
         def process(value):
-            if not value:
+            if value is None or len(value) == 0:
                 return value
-            if not isinstance(value, list) and not isinstance(value, tuple):
-                raise ValueError("expected list or tuple, got '%s'" % type(value))
-            return f"[{','.join([str(v) for v in value])}]"
+            return _vector_text(value)
 
         return process
 
     def result_processor(self, dialect, coltype):
-        def process(value):
-            if not value:
-                return value
-            vals = value.split(",")
-            vals = [self.item_type(v) for v in vals]
-            return vals
+        item_type = self.item_type
+        if self.as_numpy:
+            dtype = numpy.dtype(
+                self.dtype or ("float64" if item_type is float else "int64")
+            )
+
+            def process(value):
+                if not value:
+                    return value
+                return numpy.array(value.split(","), dtype=dtype)
+
+        elif self.as_array:
+            typecode = "d" if item_type is float else "q"
+
+            def process(value):
+                if not value:
+                    return value
+                return array.array(typecode, map(item_type, value.split(",")))
+
+        else:
+
+            def process(value):
+                if not value:
+                    return value
+                return list(map(item_type, value.split(",")))
 
         return process
 
@@ -324,14 +491,134 @@ class IRISVector(UserDefinedType):
             return 1 - self.func("vector_cosine", other)
 
         def func(self, funcname: str, other):
-            if not isinstance(other, list) and not isinstance(other, tuple):
-                raise ValueError("expected list or tuple, got '%s'" % type(other))
-            othervalue = f"[{','.join([str(v) for v in other])}]"
+            othervalue = _vector_text(other)
             return getattr(func, funcname)(
                 self, func.to_vector(othervalue, text(self.type.item_type_server))
             )
 
 
+def fetch_vectors(result, size=None, column=0):
+    """
+    Fetch up to `size` rows of the result, and return the vectors from `column`
+    as one 2-D numpy array, or None when the result is exhausted.
+    The column is expected to be `IRISVector(as_numpy=True)`.
+    When some of the rows are NULL, the vectors are returned as a list instead,
+    with None for those rows
+
+        result = conn.execute(select(IRISVector(as_numpy=True) ...))
+        while (block := fetch_vectors(result, 1000)) is not None:
+            ...
+    """
+    if numpy is None:
+        raise ImportError("fetch_vectors requires numpy")
+    rows = result.fetchmany(size) if size else result.fetchall()
+    if not rows:
+        return None
+    vectors = [row[column] for row in rows]
+    if any(vector is None for vector in vectors):
+        return vectors
+    return numpy.stack(vectors)
+
+
+# function of the score, and whether a higher score is nearer,
+# `cosine_distance` is for servers where vector_cosine() is a distance,
+# as in the `cosine_distance()` comparator
+_vector_metrics = {
+    "cosine": ("vector_cosine", True),
+    "dot": ("vector_dot_product", True),
+    "cosine_distance": ("vector_cosine", False),
+}
+
+
+def _vector_metric(metric):
+    if metric not in _vector_metrics:
+        raise ValueError(
+            "expected metric %s, got '%s'"
+            % (", ".join("'%s'" % name for name in _vector_metrics), metric)
+        )
+    return _vector_metrics[metric]
+
+
+def nearest_neighbors(column, vectors, k, *columns, metric="cosine", whereclause=None):
+    """
+    One statement for top `k` rows by each of query `vectors`,
+    UNION ALL of `TOP k ... ORDER BY score DESC` subqueries, ascending for
+    `cosine_distance`, where score is `vector_cosine(...)` or `vector_dot_product(...)`.
+    Rows are `(query_index, *columns, score)`, use `group_nearest` to split them by query
+
+        stmt = nearest_neighbors(documents.c.embedding, vectors, 10, documents.c.id)
+        for query_rows in group_nearest(conn.execute(stmt), len(vectors)):
+            ...
+    """
+    funcname, descending = _vector_metric(metric)
+
+    parts = []
+    for query_index, vector in enumerate(vectors):
+        # ordered by the name of the score, so the vector is sent and compared
+        # only once, the dialect would repeat the expression for the label
+        order_by = literal_column("score")
+        stmt = (
+            select(
+                literal_column(str(query_index)).label("query_index"),
+                *columns,
+                column.func(funcname, vector).label("score"),
+            )
+            .order_by(order_by.desc() if descending else order_by.asc())
+            .limit(k)
+        )
+        if whereclause is not None:
+            stmt = stmt.where(whereclause)
+        subquery = stmt.subquery()
+        parts.append(select(*subquery.c))
+    if len(parts) == 1:
+        return parts[0]
+    return union_all(*parts)
+
+
+def group_nearest(result, count, metric="cosine"):
+    """
+    Split rows of `nearest_neighbors` to `count` lists, one per query vector,
+    each ordered by score, the nearest first
+    """
+    _, descending = _vector_metric(metric)
+    groups = [[] for _ in range(count)]
+    for row in result:
+        groups[int(row[0])].append(row)
+    for group in groups:
+        group.sort(key=lambda row: row[-1], reverse=descending)
+    return groups
+
+
+def search_nearest(
+    connection,
+    column,
+    vectors,
+    k,
+    *columns,
+    metric="cosine",
+    whereclause=None,
+    batch_size=16,
+):
+    """
+    Top `k` rows for each of query `vectors`, `batch_size` vectors per statement.
+    With `cosine`, the rows are ordered by distance, when vector_cosine()
+    of the server is a distance
+    """
+    if metric == "cosine" and getattr(
+        connection.dialect, "vector_cosine_similarity", False
+    ):
+        # vector_cosine() of a vector with itself is 0
+        metric = "cosine_distance"
+    groups = []
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start : start + batch_size]
+        stmt = nearest_neighbors(
+            column, batch, k, *columns, metric=metric, whereclause=whereclause
+        )
+        groups += group_nearest(connection.execute(stmt), len(batch), metric)
+    return groups
+
+
 class BIT(sqltypes.TypeEngine):
     __visit_name__ = "BIT"
 
@@ -0,0 +1,111 @@
+"""
+Warm up of the connection pool, so the first requests after a deploy or
+a failover do not pay for connect, login and on_connect probes
+
+    engine = create_engine(url, pool_size=20, pool_warmup=True)
+
+    stats = warmup(engine)
+    print(stats.connections, stats.seconds, max(stats.connect_seconds))
+
+Engines of asyncio dialects are warmed up with `await warmup_async(engine)`,
+`pool_warmup` is ignored for them, the engine is created outside of the loop
+
+    engine = create_async_engine(url, pool_size=20)
+    stats = await warmup_async(engine)
+"""
+
+import asyncio
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.util.concurrency import greenlet_spawn
+
+Warmup = collections.namedtuple(
+    "Warmup", ["connections", "seconds", "connect_seconds"]
+)
+
+
+def _connect(engine):
+    started = time.perf_counter()
+    connection = engine.raw_connection()
+    return connection, time.perf_counter() - started
+
+
+def _pool_size(engine):
+    size = getattr(engine.pool, "size", None)
+    return size() if size is not None else 1
+
+
+def warmup(engine, connections=None, max_workers=None):
+    """
+    Open `connections` connections in parallel, `pool_size` by default,
+    and return them to the pool.
+    The first connection is opened alone, so features of the server are probed once.
+    Returns the number of connections, the time until all of them were ready,
+    and the time of each connect, also kept as `engine.dialect.warmup_stats`
+    """
+    if connections is None:
+        connections = _pool_size(engine)
+
+    started = time.perf_counter()
+    opened = []
+    error = None
+    try:
+        if connections > 0:
+            opened.append(_connect(engine))
+        if connections > 1:
+            with ThreadPoolExecutor(
+                max_workers=max_workers or connections - 1
+            ) as executor:
+                futures = [
+                    executor.submit(_connect, engine) for _ in range(connections - 1)
+                ]
+                for future in futures:
+                    try:
+                        opened.append(future.result())
+                    except Exception as e:
+                        error = error or e
+        seconds = time.perf_counter() - started
+    finally:
+        for connection, _ in opened:
+            connection.close()
+    if error is not None:
+        raise error
+
+    stats = Warmup(len(opened), seconds, [elapsed for _, elapsed in opened])
+    engine.dialect.warmup_stats = stats
+    return stats
+
+
+async def warmup_async(engine, connections=None):
+    """
+    `warmup()` of an AsyncEngine, connections are opened concurrently
+    on the event loop
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    if connections is None:
+        connections = _pool_size(engine)
+
+    started = time.perf_counter()
+    opened = []
+    try:
+        if connections > 0:
+            opened.append(await greenlet_spawn(_connect, engine))
+        if connections > 1:
+            results = await asyncio.gather(
+                *[greenlet_spawn(_connect, engine) for _ in range(connections - 1)],
+                return_exceptions=True,
+            )
+            errors = [result for result in results if isinstance(result, BaseException)]
+            opened += [result for result in results if isinstance(result, tuple)]
+            if errors:
+                raise errors[0]
+        seconds = time.perf_counter() - started
+    finally:
+        for connection, _ in opened:
+            await greenlet_spawn(connection.close)
+
+    stats = Warmup(len(opened), seconds, [elapsed for _, elapsed in opened])
+    engine.dialect.warmup_stats = stats
+    return stats
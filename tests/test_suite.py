@@ -1,3 +1,4 @@
+import array
 from enum import Enum
 
 from sqlalchemy.testing.suite import FetchLimitOffsetTest as _FetchLimitOffsetTest
@@ -7,9 +8,11 @@ from sqlalchemy.testing.suite import DifficultParametersTest as _DifficultParame
 from sqlalchemy.testing import fixtures
 from sqlalchemy.testing.assertions import eq_
 from sqlalchemy.testing import config
+from sqlalchemy.testing import engines
 from sqlalchemy.orm import Session
 from sqlalchemy import testing
-from sqlalchemy import Table, Column, select, func
+from sqlalchemy import Table, Column, Index, select, func, bindparam, type_coerce
+from sqlalchemy import inspect
 from sqlalchemy.types import Integer
 from sqlalchemy.types import String
 from sqlalchemy.types import VARBINARY
@@ -302,7 +305,7 @@ class IRISListBuildTest(fixtures.TablesTest):
         Table(
             "data",
             metadata,
-            Column("val", IRISListBuild(10, float)),
+            Column("val", IRISListBuild(50, float)),
         )
 
     @classmethod
@@ -348,6 +351,63 @@ class IRISListBuildTest(fixtures.TablesTest):
             ],
         )
 
+    def test_col_spec(self):
+        eq_(IRISListBuild(10, float).max_length, 100)
+        eq_(IRISListBuild(10, int).max_length, 100)
+        eq_(IRISListBuild(10, str).max_length, 65535)
+        eq_(IRISListBuild().max_length, None)
+
+    def test_listbuild_decimal(self):
+        from decimal import Decimal
+
+        from sqlalchemy_iris.listbuild import ListBuild, decode, encode
+
+        items = [
+            Decimal("12345678901234567.89"),
+            Decimal("1.5"),
+            Decimal("-0.001"),
+            Decimal("-123.45"),
+            Decimal("1E+3"),
+            7,
+            -7,
+            2.5,
+            "text",
+            None,
+        ]
+        decoded = decode(encode(items))
+        eq_(decoded, items)
+        eq_([type(item) for item in decoded], [type(item) for item in items])
+        eq_(list(ListBuild(encode(items))), items)
+
+    def test_listbuild_decode(self, connection):
+        data = self.tables.data
+        rows = (
+            connection.execute(
+                select(type_coerce(data.c.val, IRISListBuild(as_array="d"))).where(
+                    data.c.val.is_not(None)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        eq_(
+            sorted(list(row) for row in rows),
+            sorted([[1.0] * 50, [1.23] * 50, [float(i) for i in range(0, 50)]]),
+        )
+        assert all(isinstance(row, array.array) for row in rows)
+
+        rows = (
+            connection.execute(
+                select(type_coerce(data.c.val, IRISListBuild(lazy=True))).where(
+                    data.c.val.is_not(None)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        eq_(sorted(len(row) for row in rows), [50, 50, 50])
+        eq_(sorted(row[49] for row in rows), [1.0, 1.23, 49])
+
 
 class IRISVectorTest(fixtures.TablesTest):
     __backend__ = True
@@ -442,6 +502,74 @@ class IRISVectorTest(fixtures.TablesTest):
             ],
         )
 
+    def test_vector_array(self):
+        data = self.tables.data
+        self._assert_result(
+            select(type_coerce(data.c.emb, IRISVector(3, float, as_array=True))).where(
+                data.c.id == 1
+            ),
+            [
+                (array.array("d", [1, 1, 1]),),
+            ],
+        )
+        self._assert_result(
+            select(data.c.id).where(data.c.emb == array.array("d", [2, 2, 2])),
+            [
+                (2,),
+            ],
+        )
+        self._assert_result(
+            select(data.c.id).order_by(
+                data.c.emb.max_inner_product(memoryview(array.array("d", [1, 1, 1])))
+            ),
+            [
+                (1,),
+                (3,),
+                (2,),
+            ],
+        )
+
+    def test_vector_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        from sqlalchemy_iris.types import fetch_vectors
+
+        data = self.tables.data
+        emb = type_coerce(data.c.emb, IRISVector(3, float, as_numpy=True))
+        with config.db.connect() as conn:
+            result = conn.execute(
+                select(emb).where(data.c.emb == numpy.array([2.0, 2.0, 2.0]))
+            )
+            value = result.scalar()
+            eq_(value.dtype, numpy.float64)
+            eq_(value.tolist(), [2.0, 2.0, 2.0])
+
+            result = conn.execute(select(emb).order_by(data.c.id))
+            block = fetch_vectors(result, 2)
+            eq_(block.shape, (2, 3))
+            eq_(block.tolist(), [[1, 1, 1], [2, 2, 2]])
+            eq_(fetch_vectors(result, 2).tolist(), [[1, 1, 2]])
+            eq_(fetch_vectors(result, 2), None)
+
+    def test_vector_numpy_null(self, connection):
+        numpy = pytest.importorskip("numpy")
+        from sqlalchemy_iris.types import fetch_vectors
+
+        data = self.tables.data
+        emb = type_coerce(data.c.emb, IRISVector(3, float, as_numpy=True))
+        connection.execute(
+            data.insert(),
+            [
+                {"id": 4, "emb": numpy.array([0.5, 0.25, 4.0], dtype=numpy.float32)},
+                {"id": 5, "emb": None},
+            ],
+        )
+        result = connection.execute(
+            select(emb).where(data.c.id > 3).order_by(data.c.id)
+        )
+        block = fetch_vectors(result)
+        eq_(block[0].tolist(), [0.5, 0.25, 4.0])
+        eq_(block[1], None)
+
 
 class ConcatTest(fixtures.TablesTest):
     __backend__ = True
@@ -485,4 +613,1168 @@ class ConcatTest(fixtures.TablesTest):
             [
                 ("sometestdata",),
             ],
-        )
\ No newline at end of file
+        )
+
+
+class IRISInsertManyValuesTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50)),
+        )
+
+    def test_insertmanyvalues(self):
+        data = self.tables.data
+        with config.db.connect() as conn:
+            conn = conn.execution_options(insertmanyvalues_page_size=7)
+            conn.execute(data.insert(), [{"val": "v%d" % i} for i in range(50)])
+            eq_(conn.execute(select(func.count()).select_from(data)).scalar(), 50)
+
+    def test_identity_ranges(self):
+        data = self.tables.data
+        engine = engines.testing_engine(options={"identity_ranges": True})
+        with engine.begin() as conn:
+            result = conn.execute(
+                data.insert().execution_options(insertmanyvalues_page_size=7),
+                [{"val": "v%d" % i} for i in range(20)],
+            )
+            eq_(
+                [pk[0] for pk in result.inserted_primary_key_rows],
+                conn.execute(select(data.c.id).order_by(data.c.id)).scalars().all(),
+            )
+
+
+class IRISExecutemanyChunksTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50)),
+        )
+
+    @classmethod
+    def insert_data(cls, connection):
+        connection.execute(
+            cls.tables.data.insert(),
+            [{"id": i, "val": None} for i in range(1, 11)],
+        )
+
+    def test_chunked_update(self):
+        data = self.tables.data
+        with config.db.begin() as conn:
+            conn = conn.execution_options(executemany_chunk_size=3)
+            result = conn.execute(
+                data.update()
+                .where(data.c.id == bindparam("b_id"))
+                .values(val=bindparam("b_val")),
+                [{"b_id": i, "b_val": "v%d" % i} for i in range(1, 11)],
+            )
+            eq_(result.rowcount, 10)
+            eq_(
+                conn.execute(select(data.c.val).order_by(data.c.id)).scalars().all(),
+                ["v%d" % i for i in range(1, 11)],
+            )
+
+
+class IRISColumnarFetchTest(fixtures.TablesTest):
+    __backend__ = True
+
+    __only_on__ = "iris+intersystems"
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer),
+            Column("val", String(50)),
+        )
+
+    @classmethod
+    def insert_data(cls, connection):
+        connection.execute(
+            cls.tables.data.insert(),
+            [{"id": i, "val": "v%d" % i} for i in range(25)],
+        )
+
+    def test_fetch_columns(self):
+        from sqlalchemy_iris.intersystems_cursor import fetch_columns
+
+        data = self.tables.data
+        with config.db.connect() as conn:
+            result = conn.execution_options(columnar_block_size=10).execute(
+                select(data.c.id, data.c.val).order_by(data.c.id)
+            )
+            blocks = list(fetch_columns(result))
+            eq_([len(ids) for ids, _ in blocks], [10, 10, 5])
+            eq_(blocks[0][0].typecode, "q")
+            eq_(
+                [i for ids, _ in blocks for i in ids],
+                list(range(25)),
+            )
+            eq_(
+                [v for _, vals in blocks for v in vals],
+                ["v%d" % i for i in range(25)],
+            )
+
+
+class IRISServerSideCursorTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer),
+            Column("val", String(50)),
+        )
+
+    @classmethod
+    def insert_data(cls, connection):
+        connection.execute(
+            cls.tables.data.insert(),
+            [{"id": i, "val": "v%d" % i} for i in range(100)],
+        )
+
+    def test_stream_results(self):
+        data = self.tables.data
+        with config.db.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, max_row_buffer=15
+            ).execute(select(data.c.id).order_by(data.c.id))
+            assert result.context._is_server_side
+            eq_(result.fetchone(), (0,))
+            eq_(result.fetchmany(4), [(1,), (2,), (3,), (4,)])
+            eq_([row[0] for row in result], list(range(5, 100)))
+
+    def test_yield_per_partitions(self):
+        data = self.tables.data
+        with config.db.connect() as conn:
+            result = conn.execution_options(yield_per=30).execute(
+                select(data.c.id).order_by(data.c.id)
+            )
+            eq_([len(part) for part in result.partitions()], [30, 30, 30, 10])
+
+    def test_close_early(self):
+        data = self.tables.data
+        with config.db.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(
+                select(data.c.id).order_by(data.c.id)
+            )
+            eq_(result.fetchone(), (0,))
+            result.close()
+            eq_(conn.execute(select(func.count()).select_from(data)).scalar(), 100)
+
+
+class IRISVectorIndexTest(fixtures.TablesTest):
+    __backend__ = True
+
+    __requires__ = ("iris_vector",)
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", INTEGER),
+            Column("emb", IRISVector(3, float)),
+            Index(
+                "idx_data_emb",
+                "emb",
+                iris_using="HNSW",
+                iris_with={"M": 16, "Distance": "Cosine"},
+            ),
+        )
+
+    @classmethod
+    def fixtures(cls):
+        return dict(
+            data=(
+                ("id", "emb"),
+                (1, [1, 0, 0]),
+                (2, [0, 1, 0]),
+                (3, [1, 1, 0]),
+            )
+        )
+
+    def test_reflect_index(self, connection):
+        indexes = inspect(connection).get_indexes("data")
+        eq_(len(indexes), 1)
+        eq_(indexes[0]["column_names"], ["emb"])
+        eq_(indexes[0]["dialect_options"]["iris_using"], "HNSW")
+        eq_(indexes[0]["dialect_options"]["iris_with"]["Distance"], "Cosine")
+
+    def test_index_parameters(self, connection):
+        from sqlalchemy import MetaData
+        from sqlalchemy.exc import CompileError
+        from sqlalchemy.schema import CreateIndex
+
+        def create_index(**options):
+            table = Table("params", MetaData(), Column("emb", IRISVector(3, float)))
+            index = Index("idx_params", table.c.emb, **options)
+            return str(CreateIndex(index).compile(connection))
+
+        ddl = create_index(
+            iris_using="HNSW",
+            iris_with={"M": 16, "Distance": "it's", "Flag": True},
+        )
+        assert ddl.endswith("AS HNSW(M = 16, Distance = 'it''s', Flag = 1)"), ddl
+
+        for options in (
+            {"iris_using": "HNSW", "iris_with": {"M = 1) --": 16}},
+            {"iris_using": "HNSW", "iris_with": {"M": [16]}},
+            {"iris_using": "HNSW(M = 1) --"},
+        ):
+            with pytest.raises(CompileError):
+                create_index(**options)
+
+    def test_top_k(self, connection):
+        data = self.tables.data
+        stmt = select(data.c.id).order_by(data.c.emb.cosine([1, 0, 0])).limit(2)
+        assert "DESC" in str(stmt.compile(connection))
+        eq_(connection.execute(stmt).scalars().all(), [1, 3])
+
+    def test_search_nearest(self, connection):
+        from sqlalchemy_iris.types import search_nearest
+
+        data = self.tables.data
+        groups = search_nearest(
+            connection,
+            data.c.emb,
+            [[1, 0, 0], [0, 1, 0], [1, 0, 0]],
+            2,
+            data.c.id,
+            batch_size=2,
+        )
+        eq_(
+            [[row.id for row in group] for group in groups],
+            [[1, 3], [2, 3], [1, 3]],
+        )
+
+    @testing.combinations(
+        ("cosine", "DESC"),
+        ("dot", "DESC"),
+        ("cosine_distance", "ASC"),
+        argnames="metric,order",
+    )
+    def test_nearest_order(self, connection, metric, order):
+        from sqlalchemy_iris.types import group_nearest
+        from sqlalchemy_iris.types import nearest_neighbors
+
+        data = self.tables.data
+        stmt = nearest_neighbors(data.c.emb, [[1, 0, 0]], 2, data.c.id, metric=metric)
+        compiled = stmt.compile(connection)
+        assert "ORDER BY score %s" % order in str(compiled), str(compiled)
+        eq_(str(compiled).count("to_vector("), 1)
+
+        rows = [("0", 1, 0.5), ("1", 2, 0.1), ("0", 3, 0.9)]
+        eq_(
+            [[row[1] for row in group] for group in group_nearest(rows, 2, metric)],
+            [[3, 1], [2]] if order == "DESC" else [[1, 3], [2]],
+        )
+
+
+class IRISReflectionCacheTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50)),
+        )
+
+    def test_invalidated_by_ddl(self, tmp_path):
+        from sqlalchemy import event
+
+        from sqlalchemy_iris import reflection_cache
+
+        reflection_cache.clear()
+        engine = engines.testing_engine(
+            options={
+                "reflection_cache": True,
+                "reflection_cache_path": str(tmp_path),
+            }
+        )
+        with engine.connect() as conn:
+            if not conn.dialect._dictionary_access:
+                pytest.skip("%Dictionary classes are not readable")
+            columns = inspect(conn).get_columns("data")
+            eq_([c["name"] for c in columns], ["id", "val"])
+            statements = []
+
+            @event.listens_for(conn, "before_cursor_execute")
+            def collect(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            # from memory, only the stamp of the schema is queried
+            eq_(
+                [c["name"] for c in inspect(conn).get_columns("data")],
+                ["id", "val"],
+            )
+            eq_(len(statements), 1)
+            assert list(tmp_path.iterdir())
+
+            conn.exec_driver_sql("ALTER TABLE data ADD extra INTEGER")
+            try:
+                # the entry in memory is dropped by the new stamp of the schema
+                eq_(
+                    [c["name"] for c in inspect(conn).get_columns("data")],
+                    ["id", "val", "extra"],
+                )
+            finally:
+                conn.exec_driver_sql("ALTER TABLE data DROP COLUMN extra")
+
+    def test_shared_path_not_used(self, tmp_path):
+        from sqlalchemy_iris import reflection_cache
+
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        shared.chmod(0o777)
+        reflection_cache.clear()
+        engine = engines.testing_engine(
+            options={
+                "reflection_cache": True,
+                "reflection_cache_path": str(shared),
+            }
+        )
+        with engine.connect() as conn:
+            if not conn.dialect._dictionary_access:
+                return
+            with testing.expect_warnings("reflection_cache_path .* is not a folder"):
+                eq_(
+                    [c["name"] for c in inspect(conn).get_columns("data")],
+                    ["id", "val"],
+                )
+            eq_(list(shared.iterdir()), [])
+
+
+class IRISSchemaReflectionTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        from sqlalchemy import ForeignKey
+
+        Table(
+            "parent",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("name", String(50), index=True),
+        )
+        Table(
+            "child",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("parent_id", Integer, ForeignKey("parent.id")),
+            Column("val", String(20), nullable=False),
+            Index("idx_child_val", "val", unique=True),
+        )
+
+    def test_whole_schema(self, connection):
+        from sqlalchemy import event
+
+        names = ("parent", "child")
+        parameters = []
+
+        @event.listens_for(connection, "before_cursor_execute")
+        def collect(conn, cursor, statement, params, context, executemany):
+            parameters.extend(params if isinstance(params, (list, tuple)) else [])
+
+        insp = inspect(connection)
+        columns = insp.get_multi_columns()
+        pks = insp.get_multi_pk_constraint()
+        fks = insp.get_multi_foreign_keys()
+        indexes = insp.get_multi_indexes()
+        event.remove(connection, "before_cursor_execute", collect)
+
+        # the objects of the schema are selected with a subquery,
+        # not bound one by one
+        assert not set(names) & set(map(str, parameters)), parameters
+
+        insp = inspect(connection)
+        for name in names:
+            eq_(
+                [
+                    (c["name"], str(c["type"]), c["nullable"])
+                    for c in columns[(None, name)]
+                ],
+                [
+                    (c["name"], str(c["type"]), c["nullable"])
+                    for c in insp.get_columns(name)
+                ],
+            )
+            eq_(pks[(None, name)], insp.get_pk_constraint(name))
+            eq_(fks[(None, name)], insp.get_foreign_keys(name))
+            eq_(indexes[(None, name)], insp.get_indexes(name))
+        eq_(fks[(None, "child")][0]["referred_table"], "parent")
+        eq_(
+            {i["name"]: i["unique"] for i in indexes[(None, "child")]}.get(
+                "idx_child_val"
+            ),
+            True,
+        )
+
+
+class IRISMultiReflectionTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        for name in ("t1", "t2", "t3"):
+            Table(
+                name,
+                metadata,
+                Column("id", Integer, primary_key=True),
+                Column("val", String(50), index=True),
+            )
+
+    def test_objects_shared(self):
+        from sqlalchemy import event
+
+        engine = engines.testing_engine(options={"reflection_filter_max_names": 1})
+        statements = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if statement.startswith('SELECT "INFORMATION_SCHEMA"."TABLES".'):
+                statements.append(statement)
+
+        with engine.connect() as conn:
+            insp = inspect(conn)
+            filter_names = ["t1", "t3"]
+            columns = insp.get_multi_columns(filter_names=filter_names)
+            pks = insp.get_multi_pk_constraint(filter_names=filter_names)
+            indexes = insp.get_multi_indexes(filter_names=filter_names)
+
+        keys = [(None, "t1"), (None, "t3")]
+        eq_(sorted(columns), keys)
+        eq_(sorted(pks), keys)
+        eq_(sorted(indexes), keys)
+        eq_([c["name"] for c in columns[(None, "t3")]], ["id", "val"])
+        eq_(pks[(None, "t1")]["constrained_columns"], ["id"])
+        eq_(len(statements), 1)
+
+
+class IRISCatalogSnapshotTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+        )
+
+    def test_snapshot(self, metadata):
+        from sqlalchemy import event
+
+        engine = engines.testing_engine(options={"catalog_snapshot": True})
+        statements = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if '"INFORMATION_SCHEMA"."TABLES"' in statement:
+                statements.append(statement)
+
+        extra = Table("data_extra", metadata, Column("id", Integer))
+        with engine.connect() as conn:
+            assert inspect(conn).has_table("data")
+            assert inspect(conn).has_table("DATA")
+            assert not inspect(conn).has_table("data_extra")
+            assert "data" in inspect(conn).get_table_names()
+            eq_(len(statements), 1)
+
+            extra.create(conn)
+            assert inspect(conn).has_table("data_extra")
+            eq_(len(statements), 2)
+            extra.drop(conn)
+            assert not inspect(conn).has_table("data_extra")
+            eq_(len(statements), 3)
+
+    def test_snapshot_order(self, metadata):
+        # same order as the server, which does not sort mixed case names
+        # as sorted() does
+        Table("Zeta_mixed", metadata, Column("id", Integer))
+        Table("alpha_mixed", metadata, Column("id", Integer))
+        metadata.create_all(config.db)
+
+        engine = engines.testing_engine(options={"catalog_snapshot": True})
+        with engine.connect() as conn:
+            names = inspect(conn).get_table_names()
+        with config.db.connect() as conn:
+            eq_(names, inspect(conn).get_table_names())
+
+
+class IRISFeatureProbesTest(fixtures.TestBase):
+    __backend__ = True
+
+    def test_probed_once(self):
+        from sqlalchemy.pool import NullPool
+
+        engine = engines.testing_engine(options={"poolclass": NullPool})
+        with engine.connect():
+            features = engine.dialect._features
+        with engine.connect():
+            assert engine.dialect._features is features
+        eq_(engine.dialect.supports_vectors, config.db.dialect.supports_vectors)
+
+    def test_skip_probes(self):
+        engine = engines.testing_engine(
+            options={
+                "connect_args": {
+                    "probe_features": {
+                        "supports_vectors": False,
+                        "dictionary_access": True,
+                    }
+                }
+            }
+        )
+        with engine.connect() as conn:
+            eq_(conn.exec_driver_sql("select 1").scalar(), 1)
+        assert engine.dialect._features is None
+        eq_(engine.dialect.supports_vectors, False)
+        eq_(engine.dialect._dictionary_access, True)
+
+
+class IRISWarmupTest(fixtures.TestBase):
+    __backend__ = True
+
+    def test_warmup(self):
+        from sqlalchemy_iris.warmup import warmup
+
+        engine = engines.testing_engine(options={"pool_size": 3})
+        stats = warmup(engine)
+        eq_(stats.connections, 3)
+        eq_(len(stats.connect_seconds), 3)
+        eq_(engine.pool.checkedin(), 3)
+        assert engine.dialect.warmup_stats is stats
+
+    def test_pool_warmup(self):
+        engine = engines.testing_engine(options={"pool_size": 2, "pool_warmup": True})
+        eq_(engine.dialect.warmup_stats.connections, 2)
+
+    def test_async(self):
+        import asyncio
+
+        pytest.importorskip("intersystems_iris")
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        from sqlalchemy_iris.warmup import warmup_async
+
+        url = config.db.url.set(drivername="iris+irisasync")
+
+        async def go():
+            # pool_warmup can not connect outside of the event loop
+            engine = create_async_engine(url, pool_size=2, pool_warmup=True)
+            try:
+                eq_(engine.dialect.warmup_stats, None)
+                stats = await warmup_async(engine)
+                return stats, engine.sync_engine.pool.checkedin()
+            finally:
+                await engine.dispose()
+
+        stats, checkedin = asyncio.run(go())
+        eq_(stats.connections, 2)
+        eq_(checkedin, 2)
+
+
+class IRISPingTest(fixtures.TestBase):
+    __backend__ = True
+
+    def test_ping_window(self):
+        engine = engines.testing_engine(
+            options={"pool_pre_ping": True, "ping_window_ms": 60000}
+        )
+        with engine.connect() as conn:
+            conn.exec_driver_sql("select 1")
+            dbapi_connection = conn.connection.dbapi_connection
+            verified = engine.dialect._verified.get(dbapi_connection)
+            assert verified is not None
+
+        assert engine.dialect.do_ping(dbapi_connection)
+        with engine.connect() as conn:
+            eq_(conn.exec_driver_sql("select 2").scalar(), 2)
+        assert engine.dialect._verified[dbapi_connection] > verified
+
+    def test_ping(self):
+        engine = engines.testing_engine(options={"pool_pre_ping": True})
+        with engine.connect() as conn:
+            assert engine.dialect.do_ping(conn.connection.dbapi_connection)
+
+
+class IRISAsyncTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50)),
+        )
+
+    @classmethod
+    def insert_data(cls, connection):
+        connection.execute(
+            cls.tables.data.insert(),
+            [{"id": i, "val": "v%d" % i} for i in range(1, 101)],
+        )
+
+    def test_stream(self):
+        import asyncio
+
+        pytest.importorskip("intersystems_iris")
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        data = self.tables.data
+        url = config.db.url.set(drivername="iris+irisasync")
+
+        async def go():
+            engine = create_async_engine(url)
+            try:
+                async with engine.connect() as conn:
+                    result = await conn.execute(select(func.count()).select_from(data))
+                    count = result.scalar()
+                    result = await conn.stream(
+                        select(data.c.id).order_by(data.c.id),
+                        execution_options={"yield_per": 10},
+                    )
+                    ids = [row.id async for row in result]
+                return count, ids
+            finally:
+                await engine.dispose()
+
+        count, ids = asyncio.run(go())
+        eq_(count, 100)
+        eq_(ids, list(range(1, 101)))
+
+
+class IRISFanOutTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50)),
+        )
+
+    @classmethod
+    def insert_data(cls, connection):
+        connection.execute(
+            cls.tables.data.insert(),
+            [{"id": i, "val": "v%d" % (i % 7)} for i in range(1, 51)],
+        )
+
+    def test_merge(self):
+        from sqlalchemy_iris.fanout import FanOut
+
+        data = self.tables.data
+        # the same namespace twice, each row comes twice
+        with FanOut([config.db, config.db]) as fanout:
+            stmt = select(data.c.id, data.c.val).order_by(data.c.id.desc())
+            eq_(
+                [row.id for row in fanout.execute(stmt.limit(5).offset(1))],
+                [50, 49, 49, 48, 48],
+            )
+            stmt = select(data.c.val, data.c.id).order_by(data.c.val, data.c.id)
+            rows = [tuple(row) for row in fanout.execute(stmt, batch_size=7)]
+            eq_(len(rows), 100)
+            eq_(rows, sorted(rows))
+            eq_(len(list(fanout.execute(select(data.c.id)))), 100)
+
+    def test_merge_collation_and_nulls(self):
+        from sqlalchemy_iris.fanout import FanOut
+
+        data = self.tables.data
+        with config.db.begin() as conn:
+            conn.execute(
+                data.insert(),
+                [
+                    {"id": 101, "val": "B"},
+                    {"id": 102, "val": "a"},
+                    {"id": 103, "val": None},
+                ],
+            )
+        stmt = select(data.c.id, data.c.val).where(data.c.id > 100)
+        with FanOut([config.db, config.db]) as fanout:
+            for order_by in (
+                [data.c.val, data.c.id],
+                [data.c.val.desc(), data.c.id],
+                [data.c.val.nulls_last(), data.c.id],
+                [data.c.val.desc().nulls_first(), data.c.id],
+            ):
+                with config.db.connect() as conn:
+                    expected = [
+                        row.id
+                        for row in conn.execute(stmt.order_by(*order_by))
+                        for _ in range(2)
+                    ]
+                eq_(
+                    [row.id for row in fanout.execute(stmt.order_by(*order_by))],
+                    expected,
+                )
+
+    def test_close_abandoned(self):
+        from sqlalchemy_iris.fanout import FanOut
+
+        data = self.tables.data
+        fanout = FanOut([config.db, config.db])
+        rows = fanout.execute(
+            select(data.c.id, data.c.val).order_by(data.c.id), batch_size=1
+        )
+        next(rows)
+        # rows are still referenced, and not iterated to the end
+        fanout.close()
+        eq_(list(rows), [])
+
+
+class IRISLimitOffsetCompileTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50)),
+        )
+
+    @classmethod
+    def insert_data(cls, connection):
+        connection.execute(
+            cls.tables.data.insert(),
+            [{"id": i, "val": "v%02d" % i} for i in range(1, 21)],
+        )
+
+    def test_statement_not_changed(self, connection):
+        data = self.tables.data
+        stmt = select(data.c.id, data.c.val).order_by(data.c.val).offset(2).limit(3)
+        first = str(stmt.compile(connection))
+        assert "ROW_NUMBER()" in first
+        assert "%EXACT" in first
+        eq_(str(stmt.compile(connection)), first)
+        assert not hasattr(stmt, "_iris_visit")
+
+    def test_compiled_once(self, connection):
+        data = self.tables.data
+        pages = []
+        compiled = set()
+        for page in range(3):
+            stmt = (
+                select(data.c.id, data.c.val)
+                .order_by(data.c.val)
+                .offset(page * 5)
+                .limit(5)
+            )
+            result = connection.execute(stmt)
+            compiled.add(id(result.context.compiled))
+            pages.append([row.val for row in result])
+        eq_(len(compiled), 1)
+        eq_(pages, [["v%02d" % i for i in range(p, p + 5)] for p in (1, 6, 11)])
+
+    def test_exact_option(self, connection):
+        from sqlalchemy import event
+        from sqlalchemy_iris import iris_exact
+
+        data = self.tables.data
+        stmt = select(data.c.id, data.c.val).order_by(data.c.val).offset(2).limit(3)
+        statements = []
+
+        @event.listens_for(connection, "before_cursor_execute")
+        def collect(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        expected = [(i, "v%02d" % i) for i in range(3, 6)]
+        for exact in (True, False, True, False):
+            eq_(connection.execute(stmt.options(iris_exact(exact))).all(), expected)
+            eq_("%EXACT" in statements[-1], exact)
+
+    def test_exact_option_orm(self, connection):
+        from sqlalchemy import event
+        from sqlalchemy.orm import registry
+        from sqlalchemy_iris import iris_exact
+
+        class Data:
+            pass
+
+        registry().map_imperatively(Data, self.tables.data)
+        statements = []
+
+        @event.listens_for(connection, "before_cursor_execute")
+        def collect(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with Session(connection) as session:
+            for exact in (True, False):
+                stmt = select(Data).order_by(Data.val).offset(2).limit(3)
+                eq_(
+                    [row.val for row in session.scalars(stmt.options(iris_exact(exact)))],
+                    ["v%02d" % i for i in range(3, 6)],
+                )
+                eq_("%EXACT" in statements[-1], exact)
+
+                stmt = select(Data.id, Data.val).order_by(Data.val).limit(3)
+                eq_(
+                    session.execute(stmt.options(iris_exact(exact))).all(),
+                    [(i, "v%02d" % i) for i in range(1, 4)],
+                )
+                eq_("%EXACT" in statements[-1], exact)
+
+
+class IRISKeysetPaginationTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50), nullable=False),
+            Column("num", Integer),
+        )
+
+    @classmethod
+    def insert_data(cls, connection):
+        connection.execute(
+            cls.tables.data.insert(),
+            [{"id": i, "val": "v%d" % (i % 7), "num": i % 3} for i in range(1, 51)],
+        )
+
+    def _pages(self, connection, stmt, per_page):
+        from sqlalchemy_iris.keyset import paginate
+
+        pages = []
+        cursor = None
+        while True:
+            page = paginate(connection, stmt, per_page, cursor=cursor)
+            pages.append([tuple(row) for row in page.rows])
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_keyset(self, connection):
+        from sqlalchemy_iris.keyset import keyset_columns
+
+        data = self.tables.data
+        stmt = select(data.c.val, data.c.id).order_by(data.c.val.desc(), data.c.id)
+        assert keyset_columns(stmt) is not None
+        pages = self._pages(connection, stmt, 7)
+        eq_(len(pages), 8)
+        eq_(
+            [row for page in pages for row in page],
+            [tuple(row) for row in connection.execute(stmt)],
+        )
+
+    def test_offset_fallback(self, connection):
+        from sqlalchemy_iris.keyset import keyset_columns
+
+        data = self.tables.data
+        stmt = select(data.c.num, data.c.id).order_by(data.c.num, data.c.id)
+        # num is nullable
+        assert keyset_columns(stmt) is None
+        pages = self._pages(connection, stmt, 7)
+        eq_(
+            [row for page in pages for row in page],
+            [tuple(row) for row in connection.execute(stmt)],
+        )
+
+    def test_keyset_cursor_mismatch(self, connection):
+        from sqlalchemy import exc
+
+        from sqlalchemy_iris.keyset import paginate
+
+        data = self.tables.data
+        stmt = select(data.c.val, data.c.id).order_by(data.c.val, data.c.id)
+        cursor = paginate(connection, stmt, 7).next_cursor
+        # val alone is not unique, pages of it are read with OFFSET
+        stmt = select(data.c.val, data.c.id).order_by(data.c.val)
+        with pytest.raises(exc.ArgumentError):
+            paginate(connection, stmt, 7, cursor=cursor)
+
+
+class IRISTemporalBindsTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        from sqlalchemy.types import Date, DateTime, Time
+
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("d", Date),
+            Column("dt", DateTime),
+            Column("t", Time),
+        )
+
+    @testing.combinations((True,), ("logical",), ("string",), argnames="mode")
+    def test_round_trip(self, mode):
+        import datetime
+
+        data = self.tables.data
+        rows = [
+            {
+                "id": i,
+                "d": datetime.date(2024, 1, 1) + datetime.timedelta(days=i),
+                "dt": datetime.datetime(2024, 1, 1, 12, 30, i),
+                "t": datetime.time(12, 30, i),
+            }
+            for i in range(1, 11)
+        ]
+        engine = engines.testing_engine(options={"temporal_binds": mode})
+        with engine.begin() as conn:
+            conn.execute(data.delete())
+            conn.execute(data.insert(), rows)
+            eq_(
+                [
+                    dict(row._mapping)
+                    for row in conn.execute(select(data).order_by(data.c.id))
+                ],
+                rows,
+            )
+            eq_(
+                conn.execute(
+                    select(data.c.id).where(data.c.d == rows[4]["d"])
+                ).scalar(),
+                5,
+            )
+
+
+class IRISTemporalParseTest(fixtures.TestBase):
+    __backend__ = True
+
+    @testing.combinations(
+        ("2024-01-02 03:04:05", (2024, 1, 2, 3, 4, 5)),
+        ("2024-01-02 03:04:05.5", (2024, 1, 2, 3, 4, 5, 500000)),
+        ("2024-01-02 03:04:05.123456", (2024, 1, 2, 3, 4, 5, 123456)),
+        ("2024-01-02 03:04:05.123456789", (2024, 1, 2, 3, 4, 5, 123456)),
+        argnames="value,expected",
+    )
+    def test_datetime(self, value, expected):
+        import datetime
+
+        from sqlalchemy_iris.types import _parse_datetime
+
+        eq_(_parse_datetime(value), datetime.datetime(*expected))
+
+    @testing.combinations(
+        ("03:04:05", (3, 4, 5)),
+        ("03:04:05.25", (3, 4, 5, 250000)),
+        ("23:59:59.999999999", (23, 59, 59, 999999)),
+        argnames="value,expected",
+    )
+    def test_time(self, value, expected):
+        import datetime
+
+        from sqlalchemy_iris.types import _parse_time
+
+        eq_(_parse_time(value), datetime.time(*expected))
+
+    def test_date(self):
+        import datetime
+
+        from sqlalchemy_iris.types import _parse_date
+
+        eq_(_parse_date("2024-01-02"), datetime.date(2024, 1, 2))
+        eq_(_parse_date("67000"), datetime.date(2024, 6, 9))
+        eq_(_parse_date(67000), datetime.date(2024, 6, 9))
+
+    @testing.combinations(
+        ("datetime", "2024-01-02 03:04:05junk"),
+        ("datetime", "2024-01-02T03:04:05"),
+        ("datetime", "2024-01-02 03:04:05."),
+        ("datetime", "2024-+1-02 03:04:05"),
+        ("datetime", "2024-01-02 25:04:05"),
+        ("time", "03:04:05x"),
+        ("time", "03:04:05.1x"),
+        ("date", "2024-01-02x"),
+        ("date", "2024-13-02"),
+        argnames="kind,value",
+    )
+    def test_invalid(self, kind, value):
+        from sqlalchemy_iris import types
+
+        parse = getattr(types, "_parse_%s" % kind)
+        with pytest.raises(ValueError):
+            parse(value)
+
+
+class IRISBulkLoadTest(fixtures.TablesTest):
+    __backend__ = True
+
+    @classmethod
+    def define_tables(cls, metadata):
+        from sqlalchemy.types import Date
+
+        Table(
+            "data",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("val", String(50), index=True),
+            Column("d", Date),
+        )
+
+    def test_load_rows(self, connection):
+        import datetime
+
+        data = self.tables.data
+        rows = [
+            (i, "v,%d" % i if i % 3 else None, datetime.date(2024, 1, 1 + i % 28))
+            for i in range(1, 101)
+        ]
+        # a server which can not read the file of the client falls back
+        with testing.expect_warnings("LOAD DATA", assert_=False):
+            stats = connection.dialect.iris_load(connection, data, rows)
+        eq_(stats.rows, 100)
+        eq_(stats.rejected, 0)
+        assert stats.method in ("load data", "executemany")
+        eq_(
+            [
+                tuple(row)
+                for row in connection.execute(select(data).order_by(data.c.id))
+            ],
+            rows,
+        )
+
+    @testing.requires.iris_shared_files
+    def test_load_data(self, connection):
+        import datetime
+        import warnings
+
+        from sqlalchemy_iris.bulk import iris_load
+
+        data = self.tables.data
+        rows = [(i, "v%d" % i, datetime.date(2024, 1, i)) for i in range(1, 21)]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            stats = iris_load(connection, data, rows, fallback=False)
+        eq_(stats.method, "load data")
+        eq_(stats.rows, 20)
+        eq_(stats.rejected, 0)
+        eq_(
+            [tuple(row) for row in connection.execute(select(data).order_by(data.c.id))],
+            rows,
+        )
+        # the index on val is built after the load
+        eq_(connection.execute(select(data.c.id).where(data.c.val == "v7")).scalar(), 7)
+
+    def test_load_iterator(self, connection):
+        from sqlalchemy_iris.bulk import iris_load
+
+        data = self.tables.data
+        rows = ({"id": i, "val": "v%d" % i} for i in range(1, 11))
+        with testing.expect_warnings("LOAD DATA", assert_=False):
+            stats = iris_load(
+                connection, data, rows, columns=["id", "val"], chunk_size=3
+            )
+        eq_(stats.rows, 10)
+        eq_(
+            connection.execute(select(data.c.val).order_by(data.c.id))
+            .scalars()
+            .all(),
+            ["v%d" % i for i in range(1, 11)],
+        )
+
+    def test_binary_rejected(self, connection):
+        from sqlalchemy import exc
+
+        from sqlalchemy_iris.bulk import iris_load
+
+        data = self.tables.data
+        with pytest.raises(exc.ArgumentError):
+            iris_load(connection, data, [(1, b"v1")], columns=["id", "val"])
+        eq_(connection.execute(select(data.c.id)).all(), [])
+
+    def test_load_csv(self, connection):
+        import io
+
+        from sqlalchemy_iris.bulk import iris_load
+
+        data = self.tables.data
+        source = io.StringIO(
+            "id,val\n" + "".join("%d,v%d\n" % (i, i) for i in range(1, 11))
+        )
+        with testing.expect_warnings("LOAD DATA", assert_=False):
+            stats = iris_load(
+                connection,
+                data,
+                source,
+                columns=["id", "val"],
+                header=True,
+                chunk_size=3,
+            )
+        eq_(stats.rows, 10)
+        eq_(
+            connection.execute(select(data.c.val).order_by(data.c.id))
+            .scalars()
+            .all(),
+            ["v%d" % i for i in range(1, 11)],
+        )
+
+    def test_bulk_mode(self, connection):
+        from sqlalchemy import event
+
+        from sqlalchemy_iris.bulk import iris_bulk_mode
+
+        data = self.tables.data
+        statements = []
+
+        @event.listens_for(connection, "before_cursor_execute")
+        def collect(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with iris_bulk_mode(connection, data) as conn:
+            conn.execute(
+                data.insert(), [{"id": i, "val": "v%d" % i} for i in range(1, 11)]
+            )
+            conn.execute(data.update().where(data.c.id == 1).values(val="first"))
+        assert all("%NOINDEX %NOLOCK" in statement for statement in statements[:2])
+        assert statements[2].startswith("BUILD INDEX")
+
+        connection.execute(data.insert().values(id=11, val="v11"))
+        assert "%NOINDEX" not in statements[-1]
+        eq_(
+            connection.execute(select(data.c.id).where(data.c.val == "first")).scalar(),
+            1,
+        )
+
+    def test_bulk_mode_failure(self, connection):
+        from sqlalchemy import event
+
+        from sqlalchemy_iris.bulk import iris_bulk_mode
+
+        data = self.tables.data
+        statements = []
+
+        @event.listens_for(connection, "before_cursor_execute")
+        def collect(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with pytest.raises(ZeroDivisionError):
+            with iris_bulk_mode(connection, data) as conn:
+                conn.execute(data.insert().values(id=1, val="v1"))
+                1 / 0
+        assert not any(s.startswith("BUILD INDEX") for s in statements)
+        connection.execute(data.insert().values(id=2, val="v2"))
+        assert "%NOINDEX" not in statements[-1]